@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+#
+# ======================= SUMMARY ================================
+#
+# Program : bench_apache_status.py
+# Version : 0.2
+# Date    : Oct 17, 2026
+# Author  : Jan Souza - me@jansouza.com
+#
+# Command line Ex.: ./benchmarks/bench_apache_status.py -n 200
+#
+# Micro-benchmark of check_apache.parserStatus against the previous parser
+# (one if per key and eleven str.count over the Scoreboard), on generated
+# server-status?auto pages from a small prefork server up to a big event MPM
+# scoreboard. It checks that both return the same values before timing (the
+# event MPM values are only parsed by the current one).
+#
+# ======================= VERSION HISTORY and TODO ================================
+#
+#
+#  [0.1 - Oct 2026] First version of the code.
+#  [0.2 - Oct 2026] Compare only the values known by the legacy parser
+#
+#
+#  TODO
+#     (a)
+#
+# ============================ START OF PROGRAM CODE =============================
+
+import argparse
+import os, sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from check_apache import parserStatus
+
+# (label, processes, threads per process, processes running)
+SERVERS = [('prefork 400', 400, 1, 150),
+           ('event 25x64', 25, 64, 10),
+           ('event 250x64', 250, 64, 60),
+           ('event 1000x64', 1000, 64, 300)]
+
+BUSY = '_' * 12 + 'W' * 4 + 'K' * 4 + 'R' * 2 + 'SDCLGI'
+
+def legacy_parserStatus(html):
+    parsed = {
+              'server_version':None,
+              'total_accesses': None,
+              'total_kbytes': None,
+              'cpuload': None,
+              'uptime': None,
+              'requests_per_second': None,
+              'bytes_per_second': None,
+              'bytes_per_request': None,
+              'busy_workers': None,
+              'idle_workers': None,
+              'waiting_for_connection': None,
+              'starting_up': None,
+              'reading_request': None,
+              'sending_reply': None,
+              'keepalive': None,
+              'dns_lookup': None,
+              'closing_connection': None,
+              'logging': None,
+              'gracefully_finishing': None,
+              'idle_cleanup_of_worker': None,
+              'open_slots': None}
+
+    key_count = 0
+    for line in html.splitlines():
+       items = line.split(': ')
+
+       if (items and len(items) != 2):
+           continue
+
+       key = items[0]
+       value = items[1]
+
+       if key == 'ServerVersion':
+           parsed['server_version'] = str(value)
+           key_count += 1
+       if key == 'Total Accesses':
+            parsed['total_accesses'] = int(value)
+            key_count += 1
+       if key == 'Total Accesses':
+            parsed['total_accesses'] = int(value)
+            key_count += 1
+       if key == 'Total kBytes':
+            parsed['total_kbytes'] = int(value)
+            key_count += 1
+       if key == 'CPULoad':
+            parsed['cpuload'] = float(value)
+            key_count += 1
+       if key == 'Uptime':
+            parsed['uptime'] = int(value)
+            key_count += 1
+       if key == 'ReqPerSec':
+            parsed['requests_per_second'] = float(value)
+            key_count += 1
+       if key == 'BytesPerSec':
+            parsed['bytes_per_second'] = float(value)
+            key_count += 1
+       if key == 'BytesPerReq':
+           parsed['bytes_per_request'] = float(value)
+           key_count += 1
+       if key == 'BusyWorkers':
+            parsed['busy_workers'] = int(value)
+            key_count += 1
+       if key == 'IdleWorkers':
+            parsed['idle_workers'] = int(value)
+            key_count += 1
+       if key == 'Scoreboard':
+            parsed['waiting_for_connection'] = value.count('_')
+            parsed['starting_up'] = value.count('S')
+            parsed['reading_request'] = value.count('R')
+            parsed['sending_reply'] = value.count('W')
+            parsed['keepalive'] = value.count('K')
+            parsed['dns_lookup'] = value.count('D')
+            parsed['closing_connection'] = value.count('C')
+            parsed['logging'] = value.count('L')
+            parsed['gracefully_finishing'] = value.count('G')
+            parsed['idle_cleanup_of_worker'] = value.count('I')
+            parsed['open_slots'] = value.count('.')
+            key_count += 1
+
+    if (key_count < 3):
+       return None
+    else:
+       return parsed
+
+def status_page(processes, threads, running, seed=0):
+    ' Return a server-status?auto page with a scoreboard of processes x threads '
+    rnd = random.Random(seed)
+    scoreboard = []
+    for process in range(processes):
+        if process < running:
+            scoreboard.append(''.join(rnd.choice(BUSY) for thread in range(threads)))
+        else:
+            scoreboard.append('.' * threads)
+    scoreboard = ''.join(scoreboard)
+    busy = len(scoreboard) - scoreboard.count('_') - scoreboard.count('.')
+    return """ServerVersion: Apache/2.4.58 (Unix)
+ServerMPM: event
+Server Built: Jan  1 2026 00:00:00
+CurrentTime: Friday, 17-Oct-2026 10:00:00 UTC
+RestartTime: Friday, 10-Oct-2026 10:00:00 UTC
+ParentServerConfigGeneration: 1
+ParentServerMPMGeneration: 0
+ServerUptimeSeconds: 604800
+ServerUptime: 7 days
+Load1: 0.50
+Load5: 0.40
+Load15: 0.30
+Total Accesses: 123456789
+Total kBytes: 987654321
+Total Duration: 123456
+CPUUser: 100.5
+CPUSystem: 50.2
+CPUChildrenUser: 0
+CPUChildrenSystem: 0
+CPULoad: .0249
+Uptime: 604800
+ReqPerSec: 204.128
+BytesPerSec: 1672230
+BytesPerReq: 8192.1
+DurationPerReq: 1.0
+BusyWorkers: %s
+IdleWorkers: %s
+Processes: %s
+Stopping: 0
+ConnsTotal: 1200
+ConnsAsyncWriting: 3
+ConnsAsyncKeepAlive: 800
+ConnsAsyncClosing: 12
+Scoreboard: %s
+""" % (busy, scoreboard.count('_'), running, scoreboard)
+
+def get_args(argv=None):
+   parser = argparse.ArgumentParser(description="check_apache parserStatus micro-benchmark")
+   parser._optionals.title = "Options"
+
+   parser.add_argument('-n', nargs=1, required=False, help='Parses per measure (default: 200)', dest='number', type=int, default=[200])
+   parser.add_argument('-r', nargs=1, required=False, help='Measures, the best one is reported (default: 5)', dest='repeat', type=int, default=[5])
+
+   args = parser.parse_args(argv)
+   return args
+
+def main(argv=None):
+   args = get_args(argv)
+   number = args.number[0]
+   repeat = args.repeat[0]
+
+   print("%-15s %8s %12s %12s %8s" % ("server", "slots", "legacy us", "parser us", "speedup"))
+   for label, processes, threads, running in SERVERS:
+       html = status_page(processes, threads, running)
+       parsed = parserStatus(html)
+       legacy_parsed = legacy_parserStatus(html)
+       if dict((key, parsed[key]) for key in legacy_parsed) != legacy_parsed:
+           print("%s: parserStatus and legacy_parserStatus differ" % label)
+           sys.exit(1)
+
+       legacy = min(timeit.repeat(lambda: legacy_parserStatus(html), number=number, repeat=repeat)) / number
+       current = min(timeit.repeat(lambda: parserStatus(html), number=number, repeat=repeat)) / number
+       print("%-15s %8s %12.2f %12.2f %7.2fx" % (label, processes * threads, legacy * 1e6, current * 1e6, legacy / current))
+
+if __name__ == "__main__":
+   main()
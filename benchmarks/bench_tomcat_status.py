@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+#
+# ======================= SUMMARY ================================
+#
+# Program : bench_tomcat_status.py
+# Version : 0.2
+# Date    : Oct 17, 2026
+# Author  : Jan Souza - me@jansouza.com
+#
+# Command line Ex.: ./benchmarks/bench_tomcat_status.py -r 3
+#
+# Benchmark of check_tomcat.StatusParser, fed the document in chunks as it is
+# downloaded, against the previous parse (whole body joined, ET.fromstring()
+# then find/findall), on generated /manager/status/all?XML=true documents
+# from 200 up to 50000 <worker> elements. It checks that both extract the
+# same values, stuck and longest running workers included, then reports the
+# best parse time and the peak memory allocated by each parse (tracemalloc).
+#
+# ======================= VERSION HISTORY and TODO ================================
+#
+#
+#  [0.1 - Oct 2026] First version of the code.
+#  [0.2 - Oct 2026] Compare the stuck and longest running workers too
+#
+#
+#  TODO
+#     (a)
+#
+# ============================ START OF PROGRAM CODE =============================
+
+import argparse
+import os, sys
+import random
+import timeit
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from check_tomcat import StatusParser
+
+# (label, connectors, workers per connector)
+DOCUMENTS = [('200 workers', 1, 200),
+             ('2x1000 workers', 2, 1000),
+             ('2x5000 workers', 2, 5000),
+             ('4x12500 workers', 4, 12500)]
+
+STAGES = 'SSSSPRK'
+
+TOP = 5
+STUCK_AGE = 4000
+
+def legacy_parse(chunks):
+    ' Previous check_tomcat parse: whole body, then ET.fromstring(), with the workers of the tree '
+    tree_xml = ET.fromstring(b''.join(chunks))
+    memory = dict(tree_xml.find('.//memory').attrib)
+    connectors = {}
+    workers = {}
+    for connector in tree_xml.findall('./connector'):
+        name = str(connector.get('name'))
+        connectors[name] = {
+            'threadInfo': dict(connector.find('./threadInfo').attrib),
+            'requestInfo': dict(connector.find('./requestInfo').attrib)}
+        ages = sorted((int(worker.get('requestProcessingTime')) for worker in connector.iter('worker') if worker.get('stage') == 'S'), reverse=True)
+        workers[name] = (len(ages), len([age for age in ages if age >= STUCK_AGE]), ages[:TOP])
+    return memory, connectors, workers
+
+def stream_parse(chunks):
+    status = StatusParser(TOP, STUCK_AGE)
+    for chunk in chunks:
+        status.feed(chunk)
+    status.close()
+    workers = {}
+    for name in status.workers:
+        workers[name] = (status.workers[name]['busy'], status.workers[name]['stuck'], [age for age, _ in status.longest(name)])
+    return status.memory, status.connectors, workers
+
+def status_document(connectors, workers, seed=0):
+    ' Return a status/all XML document with connectors x workers <worker> elements '
+    rnd = random.Random(seed)
+    xml = ["<?xml version=\"1.0\" encoding=\"utf-8\"?><?xml-stylesheet type=\"text/xsl\" href=\"/manager/xform.xsl\" ?>\n<status>"
+           "<jvm><memory free='40000000' total='100000000' max='200000000'/>"
+           "<memorypool name='G1 Eden Space' type='Heap memory' usageInit='27262976' usageCommitted='65011712' usageMax='-1' usageUsed='8388608'/>"
+           "<memorypool name='Metaspace' type='Non-heap memory' usageInit='0' usageCommitted='30146560' usageMax='-1' usageUsed='28776312'/></jvm>"]
+    for i in range(connectors):
+        xml.append("<connector name='\"https-jsse-nio-%s\"'><threadInfo  maxThreads=\"%s\" currentThreadCount=\"%s\" currentThreadsBusy=\"%s\" />"
+                   "<requestInfo  maxTime=\"%s\" processingTime=\"%s\" requestCount=\"%s\" errorCount=\"%s\" bytesReceived=\"%s\" bytesSent=\"%s\" /><workers>"
+                   % (8443 + i, workers, workers, rnd.randint(0, workers), rnd.randint(0, 60000), rnd.randint(0, 10 ** 9),
+                      rnd.randint(0, 10 ** 7), rnd.randint(0, 10 ** 4), rnd.randint(0, 10 ** 9), rnd.randint(0, 10 ** 11)))
+        for worker in range(workers):
+            xml.append("<worker  stage=\"%s\" requestProcessingTime=\"%s\" requestBytesSent=\"0\" requestBytesReceived=\"0\" "
+                       "remoteAddr=\"10.%s.%s.%s\" virtualHost=\"www.example.com\" method=\"GET\" currentUri=\"/app/api/items/%s\" "
+                       "currentQueryString=\"page=%s&amp;size=50\" protocol=\"HTTP/1.1\" />"
+                       % (rnd.choice(STAGES), rnd.randint(0, 5000), i, worker // 256 % 256, worker % 256, worker, rnd.randint(0, 99)))
+        xml.append("</workers></connector>")
+    xml.append("</status>")
+    return "".join(xml).encode('utf-8')
+
+def peak_memory(parse, chunks):
+    ' Return the peak memory allocated by one parse, in kB '
+    tracemalloc.start()
+    parse(chunks)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak // 1024
+
+def get_args(argv=None):
+   parser = argparse.ArgumentParser(description="check_tomcat StatusParser benchmark")
+   parser._optionals.title = "Options"
+
+   parser.add_argument('-n', nargs=1, required=False, help='Parses per measure (default: 3)', dest='number', type=int, default=[3])
+   parser.add_argument('-r', nargs=1, required=False, help='Measures, the best one is reported (default: 3)', dest='repeat', type=int, default=[3])
+   parser.add_argument('-c', nargs=1, required=False, help='Chunk size in bytes (default: 16384)', dest='chunk_size', type=int, default=[16384])
+
+   args = parser.parse_args(argv)
+   return args
+
+def main(argv=None):
+   args = get_args(argv)
+   number = args.number[0]
+   repeat = args.repeat[0]
+   chunk_size = args.chunk_size[0]
+
+   print("%-16s %8s %10s %10s %8s %12s %12s" % ("document", "kB", "legacy ms", "stream ms", "speedup", "legacy kB", "stream kB"))
+   for label, connectors, workers in DOCUMENTS:
+       document = status_document(connectors, workers)
+       chunks = [document[i:i + chunk_size] for i in range(0, len(document), chunk_size)]
+       if stream_parse(chunks) != legacy_parse(chunks):
+           print("%s: StatusParser and legacy_parse differ" % label)
+           sys.exit(1)
+
+       legacy = min(timeit.repeat(lambda: legacy_parse(chunks), number=number, repeat=repeat)) / number
+       stream = min(timeit.repeat(lambda: stream_parse(chunks), number=number, repeat=repeat)) / number
+       print("%-16s %8s %10.2f %10.2f %7.2fx %12s %12s" % (label, len(document) // 1024, legacy * 1e3, stream * 1e3, legacy / stream,
+                                                          peak_memory(legacy_parse, chunks), peak_memory(stream_parse, chunks)))
+
+if __name__ == "__main__":
+   main()
@@ -3,7 +3,7 @@
 # ======================= SUMMARY ================================
 #
 # Program : check_apache.py
-# Version : 0.4
+# Version : 0.14
 # Date    : Jul 07, 2019
 # Author  : Jan Souza - me@jansouza.com
 #
@@ -41,21 +41,33 @@
 #  [0.2 - Sep 2019] Fix request timeout | Fix get no status page
 #  [0.3 - Apr 2020] Fix SSL port
 #  [0.4 - May 2020] Fix Request Log Level
+#  [0.5 - Oct 2026] Use shared asyncio fetch layer (nagios_http.py) instead of requests
+#  [0.6 - Oct 2026] Multi-target mode: many -H or -f inventory, concurrent fetch, aggregate or passive results
+#  [0.7 - Oct 2026] Add connect_time and request_time perfdata
+#  [0.8 - Oct 2026] Phase timings (dns, connect, tls, ttfb, body, parse), --phase selects where -T applies
+#  [0.9 - Oct 2026] Requests and bytes per second since the previous check from Total Accesses/kBytes, -r thresholds
+#  [0.10 - Oct 2026] Table-driven parserStatus, scoreboard histogram on bytes (benchmarks/bench_apache_status.py)
+#  [0.11 - Oct 2026] --samples/--window/--stat: mean, max and p95 of workers and scoreboard states over several samples
+#  [0.12 - Oct 2026] --extended streams the full server-status page: longest running requests and busy workers per vhost
+#  [0.13 - Oct 2026] Event MPM values (ConnsTotal, ConnsAsync*, Load1/5/15, Processes, Stopping, DurationPerReq) as perfdata, -e thresholds
+#  [0.14 - Oct 2026] Passive host_name defaults to address:port when a port is given.
 #
 #
 #  TODO
 #     (a)
 #
 # ============================ START OF PROGRAM CODE =============================
-# sudo pip install requests | sudo easy_install requests | https://pip.pypa.io/en/stable/installing/
-# https://pypi.org/project/requests/
+# Requires nagios_http.py (shared HTTP fetch layer) and nagios_state.py
+# (counter state store) in the same directory
 
 import argparse
+import asyncio
+import heapq
+import html
 import logging
 import os, sys, time
-import requests
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+import nagios_http
+import nagios_state
 import re
 
 # NAGIOS return codes :
@@ -65,6 +77,67 @@ WARNING  = 1
 CRITICAL = 2
 UNKNOWN  = 3
 
+STATE_NAMES = {OK: 'OK', WARNING: 'WARNING', CRITICAL: 'CRITICAL', UNKNOWN: 'UNKOWN'}
+
+# Rates per second since the previous check, from Total Accesses and Total kBytes
+RATES = ['requests', 'bytes']
+
+# server-status?auto key -> (parsed name, converter)
+STATUS_KEYS = {
+    'ServerVersion': ('server_version', str),
+    'Total Accesses': ('total_accesses', int),
+    'Total kBytes': ('total_kbytes', int),
+    'CPULoad': ('cpuload', float),
+    'Uptime': ('uptime', int),
+    'ReqPerSec': ('requests_per_second', float),
+    'BytesPerSec': ('bytes_per_second', float),
+    'BytesPerReq': ('bytes_per_request', float),
+    'BusyWorkers': ('busy_workers', int),
+    'IdleWorkers': ('idle_workers', int),
+    # event MPM and Apache 2.4 only
+    'DurationPerReq': ('duration_per_request', float),
+    'Load1': ('load1', float),
+    'Load5': ('load5', float),
+    'Load15': ('load15', float),
+    'Processes': ('processes', int),
+    'Stopping': ('stopping', int),
+    'ConnsTotal': ('conns_total', int),
+    'ConnsAsyncWriting': ('conns_async_writing', int),
+    'ConnsAsyncKeepAlive': ('conns_async_keepalive', int),
+    'ConnsAsyncClosing': ('conns_async_closing', int)}
+
+# Event MPM values reported when the status page has them, -e thresholds
+EVENT_METRICS = ['conns_total', 'conns_async_writing', 'conns_async_keepalive', 'conns_async_closing',
+                 'load1', 'load5', 'load15', 'processes', 'stopping', 'duration_per_request']
+
+# Scoreboard states of busy slots -> parsed name; '_' and '.' are counted apart
+SCOREBOARD_BUSY = [
+    (b'S', 'starting_up'),
+    (b'R', 'reading_request'),
+    (b'W', 'sending_reply'),
+    (b'K', 'keepalive'),
+    (b'D', 'dns_lookup'),
+    (b'C', 'closing_connection'),
+    (b'L', 'logging'),
+    (b'G', 'gracefully_finishing'),
+    (b'I', 'idle_cleanup_of_worker')]
+
+PARSED_KEYS = ([name for name, _ in STATUS_KEYS.values()] + ['waiting_for_connection']
+               + [name for _, name in SCOREBOARD_BUSY] + ['open_slots'])
+
+# Values summarized by --samples, and the statistics reported for them
+SAMPLED_KEYS = (['busy_workers', 'idle_workers', 'waiting_for_connection']
+                + [name for _, name in SCOREBOARD_BUSY] + ['open_slots']
+                + ['conns_total', 'conns_async_writing', 'conns_async_keepalive', 'conns_async_closing'])
+STATISTICS = ['mean', 'max', 'p95']
+
+# ExtendedStatus worker modes that are not busy, the same as BusyWorkers
+EXTENDED_IDLE = '_.SI'
+# Busy modes of a worker running a request, ranked by --extended
+EXTENDED_RUNNING = 'RWDL'
+# Virtual hosts counted apart, the others are added to "other"
+EXTENDED_MAX_VHOSTS = 1000
+
 mylogger = logging.getLogger(__name__)
 
 def debug_factory(logger, debug_level):
@@ -77,27 +150,52 @@ def debug_factory(logger, debug_level):
        logger._log(debug_level, msg, args, kwargs)
    return custom_debug
 
-def get_args():
+def get_args(argv=None):
    """
    Supports the command-line arguments listed below.
    """
-   parser = argparse.ArgumentParser(description="APACHE Status Check for Nagios")
+   parser = argparse.ArgumentParser(prog=os.path.basename(__file__), description="APACHE Status Check for Nagios")
    parser._optionals.title = "Options"
 
-   parser.add_argument('-H', nargs=1, required=False, help='Hostname or IP Address to check', dest='host', type=str, default=['127.0.0.1'])
+   parser.add_argument('-H', action='append', required=False, help='Hostname or IP Address to check (repeat -H to check many hosts)', dest='host', type=str)
+   parser.add_argument('-f', nargs=1, required=False, help='Inventory file, one "address[:port] [host_name]" per line', dest='host_file', type=str)
    parser.add_argument('-p', nargs=1, required=False, help='port number (default: 80)', dest='port', type=str, default=['80'])
    parser.add_argument('-u', nargs=1, required=False, help='Status URL Context', dest='context', type=str, default=['/server-status'])
 
    parser.add_argument('-T', nargs=2, required=False, help='Measure the output connection response time in seconds -T [WARN,CRIT] \n Ex.: -T 0.1 0.5', dest='response_time', type=str)
+   parser.add_argument('--phase', nargs=1, required=False, help='Apply -T to one phase of the response time (default: total)', dest='phase', type=str, default=['total'], choices=['total'] + nagios_http.PHASES)
    parser.add_argument('-C', nargs=2, required=False, help='Measure the number of clients connections currently -C [WARN,CRIT] \n Ex.: -C 30 50', dest='current_conn', type=str)
    parser.add_argument('-I', nargs=2, required=False, help='Measure the number of idle workers -I [WARN,CRIT] \n Ex.: -I 5 1', dest='idle_workers_arg', type=str)
 
+   parser.add_argument('-r', nargs=3, required=False, help='Threshold on a rate per second since the previous check -r [NAME,WARN,CRIT], repeat for more rates. NAME is one of %s. Ex.: -r requests 500 1000' % ", ".join(RATES), dest='rates', type=str, action='append', metavar=('NAME', 'WARN', 'CRIT'))
+
+   parser.add_argument('-e', nargs=3, required=False, help='Threshold on an event MPM value of the status page -e [NAME,WARN,CRIT], repeat for more values. NAME is one of %s. Ex.: -e conns_async_writing 100 200' % ", ".join(EVENT_METRICS), dest='event_metrics', type=str, action='append', metavar=('NAME', 'WARN', 'CRIT'))
+
+   parser.add_argument('--samples', nargs=1, required=False, help='Number of status samples taken over --window on one kept-alive connection (default: 1)', dest='samples', type=int, default=[1])
+   parser.add_argument('--window', nargs=1, required=False, help='Seconds between the first and the last sample (default: 10)', dest='window', type=float, default=[10.0])
+   parser.add_argument('--stat', nargs=1, required=False, help='Statistic of the samples the -C/-I thresholds apply to (default: mean)', dest='stat', type=str, default=['mean'], choices=STATISTICS)
+
+   parser.add_argument('--extended', required=False, help='Stream the full server-status page (ExtendedStatus On) and report the longest running requests and busy workers per virtual host', dest='extended', action='store_true')
+   parser.add_argument('--top', nargs=1, required=False, help='Number of requests and virtual hosts listed by --extended (default: 10)', dest='top', type=int, default=[10])
+
    parser.add_argument('--ssl', required=False, help='Enable SSL Request', dest='ssl', action='store_true')
 
+   parser.add_argument('--concurrency', nargs=1, required=False, help='Maximum concurrent requests when checking many hosts (default: 50)', dest='concurrency', type=int, default=[50])
+   parser.add_argument('--passive', nargs=1, required=False, help='Nagios command file to submit one passive result per host', dest='passive', type=str)
+   parser.add_argument('--service', nargs=1, required=False, help='Service description for passive results (default: APACHE STATUS)', dest='service', type=str, default=['APACHE STATUS'])
+
    parser.add_argument('-t', nargs=1, required=False, help='Connection Timeout', dest='timeout', type=int)
    parser.add_argument('-v', '--verbose', required=False, help='Enable verbose output', dest='verbose', action='store_true')
 
-   args = parser.parse_args()
+   args = parser.parse_args(argv)
+   if args.top[0] < 1:
+      parser.error("argument --top: must be at least 1")
+   for rate in args.rates or []:
+      if rate[0] not in RATES:
+         parser.error("argument -r: invalid rate name '%s' (choose from %s)" % (rate[0], ", ".join(RATES)))
+   for metric in args.event_metrics or []:
+      if metric[0] not in EVENT_METRICS:
+         parser.error("argument -e: invalid name '%s' (choose from %s)" % (metric[0], ", ".join(EVENT_METRICS)))
    return args
 
 def convert_to_days(seconds):
@@ -109,29 +207,23 @@ def convert_to_days(seconds):
 
     return "%s days, %s hours, %s minutes" % (days, hours, minutes)
 
+def scoreboard_histogram(parsed, value):
+    """
+    Count every scoreboard state into parsed, working on bytes. Open slots
+    ('.') and idle workers ('_'), most of a big event MPM scoreboard, are
+    dropped with bytes.translate() and counted from the length difference;
+    the busy states are then counted on the few slots left.
+    """
+    slots = value.encode('ascii', 'replace')
+    workers = slots.translate(None, b'.')
+    busy = workers.translate(None, b'_')
+    parsed['open_slots'] = len(slots) - len(workers)
+    parsed['waiting_for_connection'] = len(workers) - len(busy)
+    for char, name in SCOREBOARD_BUSY:
+        parsed[name] = busy.count(char)
+
 def parserStatus(html):
-    parsed = {
-              'server_version':None,
-              'total_accesses': None,
-              'total_kbytes': None,
-              'cpuload': None,
-              'uptime': None,
-              'requests_per_second': None,
-              'bytes_per_second': None,
-              'bytes_per_request': None,
-              'busy_workers': None,
-              'idle_workers': None,
-              'waiting_for_connection': None,
-              'starting_up': None,
-              'reading_request': None,
-              'sending_reply': None,
-              'keepalive': None,
-              'dns_lookup': None,
-              'closing_connection': None,
-              'logging': None,
-              'gracefully_finishing': None,
-              'idle_cleanup_of_worker': None,
-              'open_slots': None}
+    parsed = dict.fromkeys(PARSED_KEYS)
 
     key_count = 0
     for line in html.splitlines():
@@ -141,67 +233,227 @@ def parserStatus(html):
            continue
 
        key = items[0]
-       value = items[1]
-
-       if key == 'ServerVersion':
-           parsed['server_version'] = str(value)
+       if key in STATUS_KEYS:
+           name, converter = STATUS_KEYS[key]
+           parsed[name] = converter(items[1])
            key_count += 1
-       if key == 'Total Accesses':
-            parsed['total_accesses'] = int(value)
-            key_count += 1
-       if key == 'Total Accesses':
-            parsed['total_accesses'] = int(value)
-            key_count += 1
-       if key == 'Total kBytes':
-            parsed['total_kbytes'] = int(value)
-            key_count += 1
-       if key == 'CPULoad':
-            parsed['cpuload'] = float(value)
-            key_count += 1
-       if key == 'Uptime':
-            parsed['uptime'] = int(value)
-            key_count += 1
-       if key == 'ReqPerSec':
-            parsed['requests_per_second'] = float(value)
-            key_count += 1
-       if key == 'BytesPerSec':
-            parsed['bytes_per_second'] = float(value)
-            key_count += 1
-       if key == 'BytesPerReq':
-           parsed['bytes_per_request'] = float(value)
+       elif key == 'Scoreboard':
+           scoreboard_histogram(parsed, items[1])
            key_count += 1
-       if key == 'BusyWorkers':
-            parsed['busy_workers'] = int(value)
-            key_count += 1
-       if key == 'IdleWorkers':
-            parsed['idle_workers'] = int(value)
-            key_count += 1
-       if key == 'Scoreboard':
-            parsed['waiting_for_connection'] = value.count('_')
-            parsed['starting_up'] = value.count('S')
-            parsed['reading_request'] = value.count('R')
-            parsed['sending_reply'] = value.count('W')
-            parsed['keepalive'] = value.count('K')
-            parsed['dns_lookup'] = value.count('D')
-            parsed['closing_connection'] = value.count('C')
-            parsed['logging'] = value.count('L')
-            parsed['gracefully_finishing'] = value.count('G')
-            parsed['idle_cleanup_of_worker'] = value.count('I')
-            parsed['open_slots'] = value.count('.')
-            key_count += 1
 
     if (key_count < 3):
        return None
     else:
        return parsed
 
-def main():
-   # Handling arguments
-   args = get_args()
+class WorkerTable:
+    """
+    Incremental parser of the ExtendedStatus worker table of the full
+    server-status HTML page. feed() takes the page chunk by chunk and keeps
+    only the current unfinished row, the top-N longest running requests and
+    the busy workers per virtual host, so memory use does not depend on the
+    number of workers.
+    """
+
+    _cell = re.compile(rb'<t[dh][^>]*>(.*?)</t[dh]>', re.S)
+    _tag = re.compile(rb'<[^>]*>')
+
+    def __init__(self, top=10):
+        self.top = top
+        self.columns = None
+        self.width = 0
+        self.workers = 0
+        self.busy = 0
+        self.vhosts = {}
+        self._longest = []
+        self._rows = 0
+        self._buf = b''
+        self.res = None
+        self.parse_time = 0
+
+    def feed(self, data):
+        buf = self._buf + data
+        start = 0
+        end = buf.find(b'</tr>')
+        while end >= 0:
+            self.row(buf[start:end])
+            start = end + 5
+            end = buf.find(b'</tr>', start)
+        # Keep the unfinished row only, text outside rows is dropped
+        row_start = buf.rfind(b'<tr', start)
+        if row_start < 0:
+            row_start = max(len(buf) - 2, start)
+        self._buf = buf[row_start:]
+
+    def text(self, cell):
+        return html.unescape(self._tag.sub(b'', cell).decode('utf-8', 'replace')).strip()
+
+    def row(self, row):
+        cells = self._cell.findall(row)
+        if self.columns is None:
+            if b'<th' in row:
+                names = [self.text(cell) for cell in cells]
+                if 'M' in names and 'SS' in names:
+                    self.columns = dict((name, i) for i, name in enumerate(names))
+                    self.width = len(names)
+            return
+        if len(cells) != self.width:
+            return
+
+        self.workers += 1
+        mode = self.text(cells[self.columns['M']])
+        if not mode or mode in EXTENDED_IDLE:
+            return
+        self.busy += 1
+
+        vhost = self.field(cells, 'VHost')
+        if vhost not in self.vhosts and len(self.vhosts) >= EXTENDED_MAX_VHOSTS:
+            vhost = 'other'
+        self.vhosts[vhost] = self.vhosts.get(vhost, 0) + 1
+
+        if mode not in EXTENDED_RUNNING:
+            return
+        seconds = self.number(self.field(cells, 'SS'))
+        self._rows += 1
+        if len(self._longest) == self.top and seconds <= self._longest[0][0]:
+            return
+        entry = (seconds, self._rows, mode, self.field(cells, 'Srv'), self.field(cells, 'Client'),
+                 vhost, self.field(cells, 'Request'), self.number(self.field(cells, 'Req')))
+        if len(self._longest) < self.top:
+            heapq.heappush(self._longest, entry)
+        else:
+            heapq.heapreplace(self._longest, entry)
+
+    def field(self, cells, name):
+        ' Return the text of a column, or "" when this Apache version has no such column '
+        if name not in self.columns:
+            return ""
+        return self.text(cells[self.columns[name]])
+
+    def number(self, value):
+        try:
+            return int(value)
+        except ValueError:
+            return 0
+
+    def longest(self):
+        ' Return the top-N (seconds, mode, srv, client, vhost, request, req_ms) tuples, longest first '
+        return [entry[:1] + entry[2:] for entry in sorted(self._longest, reverse=True)]
+
+    def busiest_vhosts(self):
+        return sorted(self.vhosts.items(), key=lambda item: (-item[1], item[0]))[:self.top]
+
+    def perfdata(self):
+        longest = 0
+        if self._longest:
+            longest = max(self._longest)[0]
+        perfdata = ["extended_workers=%s extended_busy=%s longest_request=%ss" % (self.workers,self.busy,longest)]
+        for vhost, busy in self.busiest_vhosts():
+            label = re.sub(r"['=\s]", '_', vhost or 'none')
+            perfdata.append("'vhost_busy_%s'=%s" % (label, busy))
+        return " ".join(perfdata)
+
+    def report(self):
+        ' Return the long output lines '
+        if self.columns is None:
+            return ["No worker table in the server-status page (ExtendedStatus Off?)"]
+        lines = ["Top %s longest running requests:" % self.top]
+        for seconds, mode, srv, client, vhost, request, req in self.longest():
+            lines.append("  %ss %s %s %s %s %s (req %sms)" % (seconds, mode, srv, client, vhost, request, req))
+        lines.append("Busy workers per virtual host:")
+        for vhost, busy in self.busiest_vhosts():
+            lines.append("  %s %s" % (vhost or 'none', busy))
+        return lines
+
+def interval_rates(url, stats):
+   """
+   Save the Total Accesses/Total kBytes sample of a status page and return
+   the requests and bytes per second since the previous check, or None on the
+   first check, after a restart or without ExtendedStatus.
+   """
+   if stats['total_accesses'] is None or stats['total_kbytes'] is None:
+       return None
 
-   host = args.host[0]
-   port = args.port[0]
+   current = nagios_state.sample({'requests': stats['total_accesses'], 'kbytes': stats['total_kbytes']})
+   previous = nagios_state.load("check_apache", url)
+   try:
+       nagios_state.save("check_apache", url, current)
+   except OSError as ex:
+       mylogger.debug("cannot save state: %s" % ex)
 
+   elapsed, deltas = nagios_state.interval(previous, current, stats['uptime'])
+   if deltas is None:
+       return None
+   deltas['bytes'] = deltas.pop('kbytes') * 1024
+   rates = nagios_state.per_second(deltas, elapsed)
+   mylogger.debug("%s rates over %.1fs: %s" % (url,elapsed,rates))
+   return rates
+
+async def sample_status(url, samples, window, timeout, extended=None):
+   """
+   Fetch the status page samples times, evenly spread over window seconds.
+   All fetches run on one event loop, so they share the pooled keep-alive
+   connection. Return the list of responses.
+
+   With a WorkerTable in extended, the full page is then streamed into it
+   on the same connection and its response is kept in extended.res.
+   """
+   interval = 0
+   if samples > 1:
+       interval = float(window) / (samples - 1)
+
+   responses = []
+   start = time.monotonic()
+   for i in range(samples):
+       delay = start + i * interval - time.monotonic()
+       if delay > 0:
+           await asyncio.sleep(delay)
+       responses.append(await nagios_http.fetch(url, verify=False, timeout=timeout))
+
+   if extended is not None:
+       full_url = url[:-len("?auto")]
+       parse_time = 0
+       def feed(chunk):
+           nonlocal parse_time
+           parse_start = time.monotonic()
+           extended.feed(chunk)
+           parse_time += time.monotonic() - parse_start
+       extended.res = await nagios_http.fetch(full_url, verify=False, timeout=timeout, stream=feed)
+       extended.parse_time = parse_time
+   return responses
+
+def percentile(values, percent):
+   ' Nearest-rank percentile of a list of values '
+   ordered = sorted(values)
+   rank = max(int(-(-len(ordered) * percent // 100)), 1)
+   return ordered[rank - 1]
+
+def summarize_samples(samples, statistic):
+   """
+   Return the last parsed sample with every SAMPLED_KEYS value replaced by the
+   chosen statistic over all samples, and the mean/max/p95 perfdata.
+   """
+   stats = dict(samples[-1])
+   perfdata = ["samples=%s" % len(samples)]
+   for key in SAMPLED_KEYS:
+       values = [sample[key] for sample in samples if sample[key] is not None]
+       if not values:
+           continue
+       summary = {'mean': round(float(sum(values)) / len(values), 2),
+                  'max': max(values),
+                  'p95': percentile(values, 95)}
+       stats[key] = summary[statistic]
+       for name in STATISTICS:
+           perfdata.append("%s_%s=%s" % (key, name, summary[name]))
+   return stats, " ".join(perfdata)
+
+def check_status(args, host, port, stats, resp_time, res, sample_data=None, extended=None):
+   """
+   Apply the -T/-C/-I/-r thresholds to one parsed status page, or to the
+   --samples summary of several pages with its perfdata in sample_data.
+   The --extended WorkerTable adds its perfdata and long output.
+   Return the Nagios state and the output line.
+   """
    if args.response_time:
        response_warn   = args.response_time[0]
        response_crit   = args.response_time[1]
@@ -214,75 +466,6 @@ def main():
        idle_workers_warn   = args.idle_workers_arg[0]
        idle_workers_crit   = args.idle_workers_arg[1]
 
-   #url
-   context = args.context[0]
-
-   ssl = args.ssl
-   if ssl and port == "80" :
-       port = "443"
-
-   timeout = 10
-   if args.timeout:
-     timeout = args.timeout[0]
-
-   verbose = args.verbose
-   # Logging settings
-   if verbose:
-       log_level = logging.DEBUG
-   else:
-       log_level = logging.INFO
-
-   #Request Debug Level
-   logging.getLogger("urllib3").setLevel(logging.WARNING)
-   if verbose:
-        logging.getLogger("urllib3").setLevel(logging.DEBUG)
-
-   # Add custom level unknown
-   logging.addLevelName(logging.DEBUG+1, 'UNKOWN')
-   setattr(mylogger, 'unkown', debug_factory(mylogger, logging.DEBUG+1))
-
-   # Change INFO LevelName to OK
-   logging.addLevelName(logging.INFO, 'OK')
-
-   # Setting output format for Nagios
-   logging.basicConfig(stream=sys.stdout,format='%(levelname)s - %(message)s',level=log_level)
-
-   ############
-   #GET DATA
-   ###########
-
-   resp_time=0
-   try:
-     mylogger.debug("Get Stats - HOSTNAME: %s PORT: %s CONTEXT: %s TIMEOUT: %s" % (host,port,context,timeout))
-     start = time.time()
-
-     url = "http://"
-     if ssl:
-       url = "https://"
-
-     url += host + ":" + port + context + "?auto"
-     mylogger.debug("URL: %s" % (url))
-     res = requests.get(url, verify=False, timeout=timeout)
-     end = time.time()
-     mylogger.debug("STATUS_CODE: %s" % (res.status_code))
-
-     if res.status_code != 200:
-        mylogger.critical(str(res.status_code) + " Found")
-        sys.exit(CRITICAL)
-
-     stats = parserStatus(res.text)
-
-     response_time = end - start
-     resp_time = round(float(response_time), 6)
-
-     if (stats is None) :
-        mylogger.unkown("response_time %s" % resp_time)
-        sys.exit(UNKNOWN)
-
-   except Exception as ex:
-     mylogger.critical(ex)
-     sys.exit(CRITICAL)
-
    #Apache Info
    version = stats['server_version']
    uptime = stats['uptime']
@@ -294,6 +477,7 @@ def main():
    requests_per_second = stats['requests_per_second']
    bytes_per_second = stats['bytes_per_second']
    bytes_per_request = stats['bytes_per_request']
+   rates = interval_rates(str(res.url), stats)
 
    apache_info="%s on %s:%s, up %s" % (version,host,port,uptime_days)
 
@@ -307,7 +491,13 @@ def main():
    if args.response_time:
       resp_warn_data = round(float(response_warn), 6)
       resp_crit_data = round(float(response_crit), 6)
-   resp_time_data = str(resp_time) + ";" + str(resp_warn_data) + ";" + str(resp_crit_data) + ";0.000000"
+   phase = args.phase[0]
+   if phase == 'total':
+      resp_time_data = str(resp_time) + ";" + str(resp_warn_data) + ";" + str(resp_crit_data) + ";0.000000"
+      phase_data = nagios_http.phase_perfdata(res)
+   else:
+      resp_time_data = str(resp_time)
+      phase_data = nagios_http.phase_perfdata(res, phase, resp_warn_data, resp_crit_data)
 
    #Current Connections
    conn_warn_data = ""
@@ -318,9 +508,35 @@ def main():
 
    current_conn_data = str(busy_workers) + ";" + str(conn_warn_data) + ";" + str(conn_crit_data) + ";0"
 
-   perfdata = "response_time=%s busy_workers=%s idle_workers=%s requests_per_second=%s bytes_per_second=%s bytes_per_request=%s" % (resp_time_data,current_conn_data,idle_workers,requests_per_second,bytes_per_second,bytes_per_request)
+   perfdata = "response_time=%s busy_workers=%s idle_workers=%s requests_per_second=%s bytes_per_second=%s bytes_per_request=%s %s" % (resp_time_data,current_conn_data,idle_workers,requests_per_second,bytes_per_second,bytes_per_request,phase_data)
+
+   if sample_data:
+      perfdata += " " + sample_data
+
+   if rates is not None:
+      rate_thresholds = dict((rate[0], rate[1:]) for rate in args.rates or [])
+      for name in RATES:
+         warn, crit = rate_thresholds.get(name, ["", ""])
+         unit = ""
+         if name == 'bytes':
+            unit = "B"
+         perfdata += " interval_%s_per_second=%s%s;%s;%s" % (name,rates[name],unit,warn,crit)
+
+   event_thresholds = dict((metric[0], metric[1:]) for metric in args.event_metrics or [])
+   for name in EVENT_METRICS:
+      if stats[name] is not None:
+         warn, crit = event_thresholds.get(name, ["", ""])
+         perfdata += " %s=%s;%s;%s" % (name,stats[name],warn,crit)
+
+   long_output = ""
+   if extended is not None:
+      if extended.res.status_code != 200:
+         long_output = "\nserver-status page: %s Found" % extended.res.status_code
+      else:
+         perfdata += " extended_time=%.6fs extended_parse_time=%.6fs %s" % (extended.res.elapsed,extended.parse_time,extended.perfdata())
+         long_output = "\n" + "\n".join(extended.report())
 
-   output = apache_info + " | " + perfdata
+   output = apache_info + " | " + perfdata + long_output
 
    ############
    #Threshold
@@ -333,37 +549,281 @@ def main():
 	   resp_warn = round(float(response_warn), 6)
 	   resp_crit = round(float(response_crit), 6)
 
-	   if (resp_time >= resp_crit) :
-                mylogger.critical("response_time %s > %s" % (resp_time,resp_crit) + " - " + output )
-                sys.exit(CRITICAL)
-	   elif (resp_time >= resp_warn) :
-	        mylogger.warning("response_time %s > %s" % (resp_time,resp_warn) + " - " + output )
-	        sys.exit(WARNING)
+	   time_name, checked_time = nagios_http.phase_threshold(phase, resp_time, nagios_http.phase_times(res))
+
+	   if (checked_time >= resp_crit) :
+                return CRITICAL, "%s %s > %s" % (time_name,checked_time,resp_crit) + " - " + output
+	   elif (checked_time >= resp_warn) :
+	        return WARNING, "%s %s > %s" % (time_name,checked_time,resp_warn) + " - " + output
 
    #Current Connections
    if args.current_conn:
 	   mylogger.debug("Current Connections WARN: %s, CRIT %s " % (current_conn_warn,current_conn_crit) )
 
 	   if (busy_workers >= int(current_conn_crit)) :
-	       mylogger.critical("Current Connections %s > %s" % (busy_workers,current_conn_crit) + " - " + output )
-	       sys.exit(CRITICAL)
+	       return CRITICAL, "Current Connections %s > %s" % (busy_workers,current_conn_crit) + " - " + output
 	   elif (busy_workers >= int(current_conn_warn)) :
-	       mylogger.warning("Current Connections %s > %s" % (busy_workers,current_conn_warn) + " - " + output )
-	       sys.exit(WARNING)
+	       return WARNING, "Current Connections %s > %s" % (busy_workers,current_conn_warn) + " - " + output
 
    #idle_workers_arg
    if args.idle_workers_arg:
 	   mylogger.debug("idle_workers WARN: %s, CRIT %s " % (idle_workers_warn,idle_workers_crit) )
 
 	   if (idle_workers <= int(idle_workers_crit)) :
-	       mylogger.critical("idle_workers %s < %s" % (idle_workers,idle_workers_crit) + " - " + output )
-	       sys.exit(CRITICAL)
+	       return CRITICAL, "idle_workers %s < %s" % (idle_workers,idle_workers_crit) + " - " + output
 	   elif (idle_workers < int(idle_workers_warn)) :
-	       mylogger.warning("idle_workers %s < %s" % (idle_workers,idle_workers_warn) + " - " + output )
-	       sys.exit(WARNING)
+	       return WARNING, "idle_workers %s < %s" % (idle_workers,idle_workers_warn) + " - " + output
+
+   #Rates, skipped on the first check and after a restart
+   if args.rates and rates is not None:
+	   for name, warn, crit in args.rates:
+	       mylogger.debug("Rate %s: %s WARN: %s, CRIT %s " % (name,rates[name],warn,crit) )
+
+	       if (rates[name] >= float(crit)) :
+	           return CRITICAL, "interval_%s_per_second %s > %s" % (name,rates[name],crit) + " - " + output
+	       elif (rates[name] >= float(warn)) :
+	           return WARNING, "interval_%s_per_second %s > %s" % (name,rates[name],warn) + " - " + output
+
+   #Event MPM values, missing with other MPMs and Apache 2.2
+   if args.event_metrics:
+	   for name, warn, crit in args.event_metrics:
+	       value = stats[name]
+	       mylogger.debug("%s: %s WARN: %s, CRIT %s " % (name,value,warn,crit) )
+
+	       if value is None:
+	           return UNKNOWN, "%s not in the status page (event MPM only)" % name + " - " + output
+	       if (value >= float(crit)) :
+	           return CRITICAL, "%s %s > %s" % (name,value,crit) + " - " + output
+	       elif (value >= float(warn)) :
+	           return WARNING, "%s %s > %s" % (name,value,warn) + " - " + output
+
+   return OK, output
+
+def read_hosts(args):
+   """
+   Return the (host, port, host_name) list to check from the -H options and
+   the -f inventory file ("address[:port] [host_name]" per line). The
+   host_name defaults to the address, or to address:port when a port is given.
+   """
+   port = args.port[0]
+   if args.ssl and port == "80" :
+       port = "443"
+
+   entries = list(args.host or [])
+   if args.host_file:
+       with open(args.host_file[0]) as inventory:
+           for line in inventory:
+               line = line.split('#')[0].strip()
+               if line:
+                   entries.append(line)
+   if not entries:
+       entries = ['127.0.0.1']
+
+   hosts = []
+   for entry in entries:
+       items = entry.split()
+       address, _, host_port = items[0].partition(':')
+       # Keep hosts that differ only by port apart in the passive results
+       host_name = items[0]
+       if len(items) > 1:
+           host_name = items[1]
+       hosts.append((address, host_port or port, host_name))
+   return hosts
+
+def status_url(host, port, context, ssl):
+   url = "http://"
+   if ssl:
+     url = "https://"
+   return url + host + ":" + port + context + "?auto"
+
+def nagios_exit(state, output):
+   """
+   Print the Nagios output line with the level name of the state and exit.
+   """
+   if state == OK:
+       mylogger.info(output)
+   elif state == WARNING:
+       mylogger.warning(output)
+   elif state == CRITICAL:
+       mylogger.critical(output)
+   else:
+       mylogger.unkown(output)
+   sys.exit(state)
+
+def submit_passive(command_file, service, results):
+   """
+   Write one PROCESS_SERVICE_CHECK_RESULT external command per host.
+   """
+   now = int(time.time())
+   lines = []
+   for host_name, state, output in results:
+       lines.append("[%s] PROCESS_SERVICE_CHECK_RESULT;%s;%s;%s;%s - %s\n" % (now, host_name, service, state, STATE_NAMES[state], output))
+   with open(command_file, 'a') as command_pipe:
+       command_pipe.write("".join(lines))
+
+def check_hosts(args, hosts, context, ssl, timeout):
+   """
+   Fetch every server-status page concurrently, apply the thresholds to each
+   host and exit with the worst state. Hosts that are not OK are listed in the
+   long output; with --passive every host result is also submitted to Nagios.
+   """
+   concurrency = args.concurrency[0]
+   mylogger.debug("Get Stats - HOSTS: %s CONCURRENCY: %s CONTEXT: %s TIMEOUT: %s" % (len(hosts),concurrency,context,timeout))
+
+   calls = [{'url': status_url(host, port, context, ssl), 'verify': False, 'timeout': timeout} for host, port, host_name in hosts]
+   start = time.monotonic()
+   responses = nagios_http.run(nagios_http.fetch_all(calls, limit=concurrency))
+   sweep_time = round(time.monotonic() - start, 6)
+
+   results = []
+   count = {OK: 0, WARNING: 0, CRITICAL: 0, UNKNOWN: 0}
+   resp_time_max = 0
+   busy_workers_sum = 0
+   idle_workers_sum = 0
+   for (host, port, host_name), res in zip(hosts, responses):
+       if isinstance(res, Exception):
+           state, output = CRITICAL, "%s:%s %s" % (host, port, res)
+       elif res.status_code != 200:
+           state, output = CRITICAL, "%s:%s %s Found" % (host, port, res.status_code)
+       else:
+           resp_time = round(float(res.elapsed), 6)
+           resp_time_max = max(resp_time_max, resp_time)
+           # A page that cannot be parsed is UNKNOWN for its host only
+           try:
+               parse_start = time.monotonic()
+               stats = parserStatus(res.text)
+               res.parse_time = time.monotonic() - parse_start
+               if (stats is None) :
+                   state, output = UNKNOWN, "%s:%s response_time %s" % (host, port, resp_time)
+               else:
+                   state, output = check_status(args, host, port, stats, resp_time, res)
+                   busy_workers_sum += stats['busy_workers'] or 0
+                   idle_workers_sum += stats['idle_workers'] or 0
+           except Exception as ex:
+               state, output = UNKNOWN, "%s:%s %s: %s" % (host, port, ex.__class__.__name__, ex)
+       mylogger.debug("%s %s - %s" % (host_name, STATE_NAMES[state], output))
+       count[state] += 1
+       results.append((host_name, state, output))
+
+   if args.passive:
+       submit_passive(args.passive[0], args.service[0], results)
+
+   worst = OK
+   for state in (UNKNOWN, WARNING, CRITICAL):
+       if count[state]:
+           worst = state
+
+   resp_warn_data = ""
+   resp_crit_data = ""
+   if args.response_time and args.phase[0] == 'total':
+      resp_warn_data = round(float(args.response_time[0]), 6)
+      resp_crit_data = round(float(args.response_time[1]), 6)
+
+   summary = "%s hosts, %s critical, %s warning, %s unknown, %s ok in %ss" % (len(hosts),count[CRITICAL],count[WARNING],count[UNKNOWN],count[OK],sweep_time)
+   perfdata = "hosts=%s ok=%s warning=%s critical=%s unknown=%s sweep_time=%ss response_time_max=%s;%s;%s;0.000000 busy_workers_sum=%s idle_workers_sum=%s" % (len(hosts),count[OK],count[WARNING],count[CRITICAL],count[UNKNOWN],sweep_time,resp_time_max,resp_warn_data,resp_crit_data,busy_workers_sum,idle_workers_sum)
+
+   long_output = ""
+   for host_name, state, output in results:
+       if state != OK:
+           long_output += "\n%s - %s: %s" % (STATE_NAMES[state], host_name, output.split(" | ")[0])
+
+   nagios_exit(worst, summary + " | " + perfdata + long_output)
+
+def main(argv=None):
+   # Handling arguments
+   args = get_args(argv)
+
+   hosts = read_hosts(args)
+   host, port, host_name = hosts[0]
+
+   #url
+   context = args.context[0]
+
+   ssl = args.ssl
+
+   timeout = 10
+   if args.timeout:
+     timeout = args.timeout[0]
+
+   verbose = args.verbose
+   # Logging settings
+   if verbose:
+       log_level = logging.DEBUG
+   else:
+       log_level = logging.INFO
+
+   # Add custom level unknown
+   logging.addLevelName(logging.DEBUG+1, 'UNKOWN')
+   setattr(mylogger, 'unkown', debug_factory(mylogger, logging.DEBUG+1))
+
+   # Change INFO LevelName to OK
+   logging.addLevelName(logging.INFO, 'OK')
+
+   # Setting output format for Nagios
+   logging.basicConfig(stream=sys.stdout,format='%(levelname)s - %(message)s',level=log_level)
+
+   ############
+   #GET DATA
+   ###########
+
+   samples = args.samples[0]
+   if len(hosts) > 1 or args.host_file:
+       if samples > 1 or args.extended:
+           mylogger.unkown("--samples and --extended are not supported with many hosts")
+           sys.exit(UNKNOWN)
+       check_hosts(args, hosts, context, ssl, timeout)
+
+   resp_time=0
+   sample_data = None
+   extended = None
+   if args.extended:
+      extended = WorkerTable(args.top[0])
+   try:
+     mylogger.debug("Get Stats - HOSTNAME: %s PORT: %s CONTEXT: %s TIMEOUT: %s" % (host,port,context,timeout))
+     start = time.monotonic()
+
+     url = status_url(host, port, context, ssl)
+     mylogger.debug("URL: %s" % (url))
+     if samples > 1 or extended is not None:
+        mylogger.debug("SAMPLES: %s WINDOW: %ss EXTENDED: %s" % (samples,args.window[0],args.extended))
+        responses = nagios_http.run(sample_status(url, samples, args.window[0], timeout, extended))
+     else:
+        responses = [nagios_http.get(url, verify=False, timeout=timeout)]
+     end = time.monotonic()
+
+     parsed = []
+     for res in responses:
+        mylogger.debug("STATUS_CODE: %s" % (res.status_code))
+        if res.status_code != 200:
+           mylogger.critical(str(res.status_code) + " Found")
+           sys.exit(CRITICAL)
+
+        parse_start = time.monotonic()
+        stats = parserStatus(res.text)
+        res.parse_time = time.monotonic() - parse_start
+        parsed.append(stats)
+
+     # With --samples or --extended, response_time is the one of the first sample
+     res = responses[0]
+     response_time = end - start
+     if samples > 1 or extended is not None:
+        response_time = res.elapsed
+     resp_time = round(float(response_time), 6)
+
+     if (None in parsed) :
+        mylogger.unkown("response_time %s" % resp_time)
+        sys.exit(UNKNOWN)
+
+     stats = parsed[-1]
+     if samples > 1:
+        stats, sample_data = summarize_samples(parsed, args.stat[0])
+
+   except Exception as ex:
+     mylogger.critical(ex)
+     sys.exit(CRITICAL)
 
-   mylogger.info(output)
-   sys.exit(OK)
+   state, output = check_status(args, host, port, stats, resp_time, res, sample_data, extended)
+   nagios_exit(state, output)
 
 if __name__ == "__main__":
    main()
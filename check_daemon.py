@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+#
+# ======================= SUMMARY ================================
+#
+# Program : check_daemon.py
+# Version : 0.3
+# Date    : Oct 17, 2026
+# Author  : Jan Souza - me@jansouza.com
+#
+# Command line Ex.: ./check_daemon.py -s /tmp/nagios_check_daemon.sock
+#
+# Long-running process that loads every check_*.py plugin once and runs
+# them in-process. Each connection on the Unix socket carries the argv of
+# one check; the reply carries the plugin exit code, stdout and stderr, the
+# same as if the plugin had been executed by Nagios.
+#
+# ======================= PROTOCOL ================================
+#
+# Request  : argv items separated by NUL (argv[0] is the plugin name,
+#            ex. "check_apache" or "check_apache.py"), then the client
+#            shuts down its write side.
+# Response : "<exit_code> <stdout_length>\n" + stdout + stderr
+#
+# ======================= VERSION HISTORY and TODO ================================
+#
+#
+#  [0.1 - Oct 2026] First version of the code.
+#  [0.2 - Oct 2026] Per-check output and -v follow the check onto the shared HTTP loop (contextvars).
+#  [0.3 - Oct 2026] Usage errors name the plugin, not check_daemon.py.
+#
+#
+#  TODO
+#     (a)
+#
+# ============================ START OF PROGRAM CODE =============================
+
+import argparse
+import contextvars
+import importlib
+import io
+import logging
+import os, sys, time
+import socketserver
+import traceback
+
+import nagios_http
+
+# NAGIOS return codes :
+# https://nagios-plugins.org/doc/guidelines.html#AEN78
+OK       = 0
+WARNING  = 1
+CRITICAL = 2
+UNKNOWN  = 3
+
+PLUGINS = ['check_apache', 'check_nginx', 'check_tomcat', 'check_tomcat_dbcp',
+           'check_jboss', 'check_solr', 'check_redis', 'check_memcached']
+
+DEFAULT_SOCKET = os.environ.get('CHECK_DAEMON_SOCKET', '/tmp/nagios_check_daemon.sock')
+
+mylogger = logging.getLogger(__name__)
+
+class ContextStream(object):
+    """
+    File-like object that writes to the buffer of the check running in the
+    current context, and to the real stream otherwise. The context follows
+    the check onto the shared nagios_http loop, so the debug records and
+    stream callbacks of its requests land in its own reply.
+    """
+
+    def __init__(self, stream, name):
+        self._stream = stream
+        self._buf = contextvars.ContextVar(name, default=None)
+
+    def capture(self, buf):
+        return self._buf.set(buf)
+
+    def release(self, token):
+        self._buf.reset(token)
+
+    def _target(self):
+        buf = self._buf.get()
+        if buf is None:
+            return self._stream
+        return buf
+
+    def write(self, data):
+        return self._target().write(data)
+
+    def flush(self):
+        return self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+class VerboseFilter(logging.Filter):
+    """
+    Drop DEBUG records unless the check running in the current context
+    was called with -v/--verbose.
+    """
+
+    def __init__(self, default=False):
+        logging.Filter.__init__(self)
+        self.default = default
+        self._verbose = contextvars.ContextVar('verbose', default=None)
+
+    def set_verbose(self, verbose):
+        return self._verbose.set(verbose)
+
+    def reset(self, token):
+        self._verbose.reset(token)
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        verbose = self._verbose.get()
+        if verbose is None:
+            return self.default
+        return verbose
+
+class CheckRunner(object):
+    """
+    Keep the plugin modules loaded and run their main() with a given argv.
+    """
+
+    def __init__(self, plugins=PLUGINS):
+        self.modules = {}
+        self.errors = {}
+        for name in plugins:
+            try:
+                self.modules[name] = importlib.import_module(name)
+            except Exception as ex:
+                self.errors[name] = "%s: %s" % (ex.__class__.__name__, ex)
+
+    def plugin_name(self, argv0):
+        name = os.path.basename(argv0)
+        if name.endswith('.py'):
+            name = name[:-3]
+        return name
+
+    def run(self, argv):
+        ' Run one check and return (exit_code, stdout, stderr) '
+        name = self.plugin_name(argv[0])
+        module = self.modules.get(name)
+        if module is None:
+            error = self.errors.get(name, "plugin not loaded")
+            return UNKNOWN, "UNKOWN - %s: %s\n" % (name, error), ""
+
+        out = io.StringIO()
+        err = io.StringIO()
+        out_token = sys.stdout.capture(out)
+        err_token = sys.stderr.capture(err)
+        verbose_token = verbose_filter.set_verbose('-v' in argv or '--verbose' in argv)
+        try:
+            try:
+                module.main(argv[1:])
+                code = OK
+            except SystemExit as ex:
+                code = ex.code
+                if code is None:
+                    code = OK
+                elif not isinstance(code, int):
+                    err.write("%s\n" % code)
+                    code = 1
+            except Exception:
+                traceback.print_exc(file=err)
+                code = 1
+        finally:
+            sys.stdout.release(out_token)
+            sys.stderr.release(err_token)
+            verbose_filter.reset(verbose_token)
+        return code, out.getvalue(), err.getvalue()
+
+class CheckHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        data = self.rfile.read()
+        argv = data.decode('utf-8').split('\0')
+        if not argv or not argv[0]:
+            return
+
+        start = time.time()
+        code, out, err = self.server.runner.run(argv)
+        mylogger.debug("%s exit %s in %.6fs" % (argv[0], code, time.time() - start))
+
+        out = out.encode('utf-8')
+        self.wfile.write(("%s %s\n" % (code, len(out))).encode('ascii'))
+        self.wfile.write(out)
+        self.wfile.write(err.encode('utf-8'))
+
+class CheckServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+verbose_filter = VerboseFilter()
+
+def get_args(argv=None):
+   """
+   Supports the command-line arguments listed below.
+   """
+   parser = argparse.ArgumentParser(description="Resident Nagios Check Daemon")
+   parser._optionals.title = "Options"
+
+   parser.add_argument('-s', nargs=1, required=False, help='Unix socket path (default: %s)' % DEFAULT_SOCKET, dest='socket', type=str, default=[DEFAULT_SOCKET])
+   parser.add_argument('-m', nargs=1, required=False, help='Socket file mode in octal (default: 660)', dest='mode', type=str, default=['660'])
+   parser.add_argument('-c', nargs=1, required=False, help='Maximum HTTP connections per host:port (default: %s)' % nagios_http.DEFAULT_MAX_PER_HOST, dest='max_per_host', type=int, default=[nagios_http.DEFAULT_MAX_PER_HOST])
+   parser.add_argument('-i', nargs=1, required=False, help='Seconds before an idle keep-alive connection is closed (default: %s)' % nagios_http.DEFAULT_IDLE_TIMEOUT, dest='idle_timeout', type=int, default=[nagios_http.DEFAULT_IDLE_TIMEOUT])
+   parser.add_argument('-v', '--verbose', required=False, help='Enable verbose output', dest='verbose', action='store_true')
+
+   args = parser.parse_args(argv)
+   return args
+
+def main(argv=None):
+   # Handling arguments
+   args = get_args(argv)
+
+   socket_path = args.socket[0]
+   mode = int(args.mode[0], 8)
+
+   # Plugins write their Nagios line to sys.stdout through logging; route
+   # it to a per-check buffer while a check runs.
+   sys.stdout = ContextStream(sys.stdout, 'stdout')
+   sys.stderr = ContextStream(sys.stderr, 'stderr')
+
+   # Configure the root logger once, so the logging.basicConfig() call in
+   # each plugin main() is a no-op and -v is honoured per check.
+   logging.addLevelName(logging.DEBUG+1, 'UNKOWN')
+   logging.addLevelName(logging.INFO, 'OK')
+   handler = logging.StreamHandler(sys.stdout)
+   handler.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
+   handler.addFilter(verbose_filter)
+   root = logging.getLogger()
+   root.addHandler(handler)
+   root.setLevel(logging.DEBUG)
+   verbose_filter.default = args.verbose
+
+   sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+   runner = CheckRunner()
+   nagios_http.start_loop(args.max_per_host[0], args.idle_timeout[0])
+   for name in runner.errors:
+       mylogger.warning("%s not loaded - %s" % (name, runner.errors[name]))
+
+   if os.path.exists(socket_path):
+       os.unlink(socket_path)
+
+   server = CheckServer(socket_path, CheckHandler)
+   server.runner = runner
+   os.chmod(socket_path, mode)
+   mylogger.info("listening on %s, plugins: %s" % (socket_path, " ".join(sorted(runner.modules))))
+
+   try:
+       server.serve_forever()
+   except KeyboardInterrupt:
+       pass
+   finally:
+       server.server_close()
+       os.unlink(socket_path)
+
+if __name__ == "__main__":
+   main()
@@ -3,7 +3,7 @@
 # ======================= SUMMARY ================================
 #
 # Program : check_jboss.py
-# Version : 0.2
+# Version : 0.6
 # Date    : Sep 15, 2019
 # Author  : Jan Souza - me@jansouza.com
 #
@@ -40,21 +40,22 @@
 #
 #  [0.1 - Sep 2019] First version of the code.
 #  [0.2 - May 2020] Fix Request Log Level
+#  [0.3 - Oct 2026] Use shared asyncio fetch layer (nagios_http.py) instead of requests
+#  [0.4 - Oct 2026] Add connect_time and request_time perfdata
+#  [0.5 - Oct 2026] Phase timings (dns, connect, tls, ttfb, body, parse) perfdata
+#  [0.6 - Oct 2026] One composite POST for heap, non-heap, threads, GC, datasources and undertow listeners (-S)
 #
 #  TODO
-#     (a) Get Threads Informations
-#     (b) Get Server Information
+#     (a) Get Server Information
 #
 # ============================ START OF PROGRAM CODE =============================
-# sudo pip install requests | sudo easy_install requests
-# https://pypi.org/project/requests/
+# Requires nagios_http.py (shared HTTP fetch layer) in the same directory
 
 import argparse
+import json
 import logging
 import os, sys, time
-import requests
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+import nagios_http
 import xml.etree.ElementTree as ET
 from math import log
 
@@ -65,6 +66,41 @@ WARNING  = 1
 CRITICAL = 2
 UNKNOWN  = 3
 
+# Steps of the composite operation, read in one management API request:
+# (section, step name, operation). A wildcard (*) address returns one result
+# per resource, named after the wildcard values.
+PLATFORM_MBEAN = {'core-service': 'platform-mbean'}
+COMPOSITE_STEPS = [
+    ('memory', 'heap', {'operation': 'read-attribute', 'address': [PLATFORM_MBEAN, {'type': 'memory'}], 'name': 'heap-memory-usage'}),
+    ('memory', 'non_heap', {'operation': 'read-attribute', 'address': [PLATFORM_MBEAN, {'type': 'memory'}], 'name': 'non-heap-memory-usage'}),
+    ('threads', 'threads', {'operation': 'read-attribute', 'address': [PLATFORM_MBEAN, {'type': 'threading'}], 'name': 'thread-count'}),
+    ('threads', 'threads_peak', {'operation': 'read-attribute', 'address': [PLATFORM_MBEAN, {'type': 'threading'}], 'name': 'peak-thread-count'}),
+    ('threads', 'threads_daemon', {'operation': 'read-attribute', 'address': [PLATFORM_MBEAN, {'type': 'threading'}], 'name': 'daemon-thread-count'}),
+    ('gc', 'gc', {'operation': 'read-resource', 'address': [PLATFORM_MBEAN, {'type': 'garbage-collector'}, {'name': '*'}], 'include-runtime': True}),
+    ('datasources', 'datasources', {'operation': 'read-resource', 'address': [{'subsystem': 'datasources'}, {'data-source': '*'}, {'statistics': 'pool'}], 'include-runtime': True}),
+    ('datasources', 'xa_datasources', {'operation': 'read-resource', 'address': [{'subsystem': 'datasources'}, {'xa-data-source': '*'}, {'statistics': 'pool'}], 'include-runtime': True}),
+    ('undertow', 'http_listeners', {'operation': 'read-resource', 'address': [{'subsystem': 'undertow'}, {'server': '*'}, {'http-listener': '*'}], 'include-runtime': True}),
+    ('undertow', 'https_listeners', {'operation': 'read-resource', 'address': [{'subsystem': 'undertow'}, {'server': '*'}, {'https-listener': '*'}], 'include-runtime': True})]
+SECTIONS = ['memory', 'threads', 'gc', 'datasources', 'undertow']
+# Platform MBean sections that every version has; the datasources and undertow
+# subsystems are opt-in, since one missing step rolls back the whole operation
+DEFAULT_SECTIONS = ['memory', 'threads', 'gc']
+
+# datasource pool statistics attribute -> (perfdata label, unit)
+DATASOURCE_STATS = [('InUseCount', 'ds_in_use', ''),
+                    ('ActiveCount', 'ds_active', ''),
+                    ('AvailableCount', 'ds_available', ''),
+                    ('MaxUsedCount', 'ds_max_used', ''),
+                    ('WaitCount', 'ds_wait', ''),
+                    ('AverageBlockingTime', 'ds_blocking_time', 'ms'),
+                    ('TimedOut', 'ds_timed_out', 'c')]
+# undertow listener attribute -> (perfdata label, unit)
+LISTENER_STATS = [('request-count', 'requests', 'c'),
+                  ('error-count', 'errors', 'c'),
+                  ('bytes-received', 'bytes_received', 'c'),
+                  ('bytes-sent', 'bytes_sent', 'c'),
+                  ('max-processing-time', 'max_time', 'ms')]
+
 mylogger = logging.getLogger(__name__)
 
 def debug_factory(logger, debug_level):
@@ -77,11 +113,11 @@ def debug_factory(logger, debug_level):
        logger._log(debug_level, msg, args, kwargs)
    return custom_debug
 
-def get_args():
+def get_args(argv=None):
    """
    Supports the command-line arguments listed below.
    """
-   parser = argparse.ArgumentParser(description="WILDFLY Status Check for Nagios")
+   parser = argparse.ArgumentParser(prog=os.path.basename(__file__), description="WILDFLY Status Check for Nagios")
    parser._optionals.title = "Options"
 
    parser.add_argument('-H', nargs=1, required=False, help='Hostname or IP Address to check', dest='host', type=str, default=['127.0.0.1'])
@@ -91,17 +127,69 @@ def get_args():
    parser.add_argument('-u', nargs=1, required=True, help='username', dest='username', type=str)
    parser.add_argument('-p', nargs=1, required=True, help='password', dest='password', type=str)
 
+   parser.add_argument('-S', nargs='+', required=False, help='Sections read by the composite operation: %s (default: %s)' % (" ".join(SECTIONS), " ".join(DEFAULT_SECTIONS)), dest='sections', choices=SECTIONS, default=DEFAULT_SECTIONS, metavar='SECTION')
    parser.add_argument('-M', nargs=2, required=False, help='Measure the percent of used memory heap -M [WARN,CRIT] \n Ex.: -C 80 90', dest='mem_used', type=str)
 
    parser.add_argument('-t', nargs=1, required=False, help='Connection Timeout', dest='timeout', type=int)
    parser.add_argument('-v', '--verbose', required=False, help='Enable verbose output', dest='verbose', action='store_true')
 
-   args = parser.parse_args()
+   args = parser.parse_args(argv)
+   if args.mem_used and 'memory' not in args.sections:
+      parser.error("argument -M: needs the memory section (-S)")
    return args
 
-def main():
+def composite_operation(sections):
+   """
+   Return the steps of the selected sections and the composite operation
+   that reads all of them in one request.
+   """
+   steps = [step for step in COMPOSITE_STEPS if step[0] in sections]
+   operation = {'operation': 'composite', 'address': [],
+                'steps': [step_operation for _, _, step_operation in steps]}
+   return steps, operation
+
+def wildcard_name(step_address, address):
+   ' Name of one result of a wildcard read: the values that matched a * '
+   names = []
+   for pattern, element in zip(step_address, address):
+       for key, value in pattern.items():
+           if value == '*':
+               names.append(str(element.get(key)))
+   return "_".join(names).replace(" ","_").replace("/","_")
+
+def parse_composite(steps, response):
+   """
+   Return {step name: result} of a composite operation response, with the
+   wildcard results as {name: attributes}. Raise ValueError when it failed.
+   """
+   if response.get('outcome') != 'success':
+       raise ValueError("composite operation failed: %s" % json.dumps(response.get('failure-description')))
+
+   status = {}
+   results = response.get('result') or {}
+   for i, (section, name, operation) in enumerate(steps):
+       step = results.get('step-%s' % (i + 1)) or {}
+       result = step.get('result')
+       if isinstance(result, list):
+           status[name] = {}
+           for item in result:
+               if item.get('outcome') == 'success':
+                   status[name][wildcard_name(operation['address'], item.get('address', []))] = item.get('result') or {}
+       else:
+           status[name] = result
+   return status
+
+def counter_perfdata(name, values, stats):
+   ' Perfdata of the attributes of one resource that are defined '
+   perfdata = ""
+   for attr, stat_label, unit in stats:
+       if values.get(attr) is not None:
+           perfdata += "%s-%s=%s%s " % (stat_label, name, values[attr], unit)
+   return perfdata
+
+def main(argv=None):
    # Handling arguments
-   args = get_args()
+   args = get_args(argv)
 
    host = args.host[0]
    port = args.port[0]
@@ -128,12 +216,6 @@ def main():
    else:
        log_level = logging.INFO
 
-   #Request Debug Level
-   logging.getLogger("urllib3").setLevel(logging.WARNING)
-   if verbose:
-       logging.getLogger("urllib3").setLevel(logging.DEBUG)
-
-
    # Add custom level unknown
    logging.addLevelName(logging.DEBUG+1, 'UNKOWN')
    setattr(mylogger, 'unkown', debug_factory(mylogger, logging.DEBUG+1))
@@ -152,27 +234,35 @@ def main():
    status = {}
    try:
      mylogger.debug("Get Stats - HOSTNAME: %s PORT: %s CONTEXT: %s TIMEOUT: %s" % (host,port,context,timeout))
-     start = time.time()
+     start = time.monotonic()
 
-     url = "http://" + host + ":" + port + context + "/core-service/platform-mbean/type/memory?operation=attribute&name=heap-memory-usage"
+     #All the sections with one composite operation: one authenticated round trip
+     url = "http://" + host + ":" + port + context
+     steps, operation = composite_operation(args.sections)
      mylogger.debug("URL: %s" % (url))
+     mylogger.debug(operation)
 
      headers = {'content-type': 'application/json'}
-     auth=requests.auth.HTTPDigestAuth(username,password)
+     auth=nagios_http.DigestAuth(username,password)
      mylogger.debug(headers)
 
-     res = requests.get(url,headers=headers,auth=auth, timeout=timeout)
+     # The management interface certificate is verified, as requests did by default
+     res = nagios_http.post(url,headers=headers,auth=auth,data=json.dumps(operation),timeout=timeout,verify=True)
 
-     if res.status_code != 200:
+     # A failed operation is a 500 with its failure-description
+     if res.status_code != 200 and not (res.status_code == 500 and res.content.startswith(b'{')):
         mylogger.critical(str(res.status_code) + " Found")
         sys.exit(CRITICAL)
 
-     status_mem = res.json()
-     end = time.time()
+     parse_start = time.monotonic()
+     status = parse_composite(steps, res.json())
+     res.parse_time = time.monotonic() - parse_start
+     end = time.monotonic()
      response_time = end - start
      resp_time = round(float(response_time), 6)
 
-     if (status_mem is None) :
+     status_mem = status.get('heap')
+     if ('memory' in args.sections and status_mem is None) :
         mylogger.unkown("response_time %s" % resp_time)
         sys.exit(UNKNOWN)
 
@@ -180,7 +270,7 @@ def main():
      mylogger.critical(ex)
      sys.exit(CRITICAL)
 
-   mylogger.debug(status_mem)
+   mylogger.debug(status)
 
    ############
    #perfdata
@@ -193,14 +283,45 @@ def main():
        mem_warn_data = mem_used_warn
        mem_crit_data = mem_used_crit
 
-   used_heap = int(status_mem['used'])
-   max_heap = int(status_mem['max'])
-   percent_used_memory = round((float(used_heap * 100) / max_heap), 2)
-
-   mem_used_data = str(percent_used_memory) + "%;" + str(mem_warn_data) + ";" + str(mem_crit_data)
-   heap_size_data = str(used_heap) + ";;;" + str(max_heap)
-
-   perfdata = "heap_percent_used=%s heap_size=%s" % (mem_used_data,heap_size_data)
+   memory_data = ""
+   if status_mem is not None:
+       used_heap = int(status_mem['used'])
+       max_heap = int(status_mem['max'])
+       percent_used_memory = round((float(used_heap * 100) / max_heap), 2)
+
+       mem_used_data = str(percent_used_memory) + "%;" + str(mem_warn_data) + ";" + str(mem_crit_data)
+       heap_size_data = str(used_heap) + ";;;" + str(max_heap)
+       memory_data = "heap_percent_used=%s heap_size=%s " % (mem_used_data,heap_size_data)
+
+   #Memory Non Heap
+   if status.get('non_heap') is not None:
+       memory_data += "non_heap_size=%s non_heap_committed=%s " % (status['non_heap']['used'],status['non_heap']['committed'])
+
+   #Threads
+   threads_data = ""
+   for name in ('threads', 'threads_peak', 'threads_daemon'):
+       if status.get(name) is not None:
+           threads_data += "%s=%s " % (name,status[name])
+
+   #GC
+   gc_data = ""
+   for name, collector in sorted(status.get('gc', {}).items()):
+       gc_data += "gc_count-" + name + "=" + str(collector.get('collection-count')) + "c "
+       gc_data += "gc_time-" + name + "=" + str(collector.get('collection-time')) + "ms "
+
+   #Datasources pool statistics
+   datasource_data = ""
+   for step in ('datasources', 'xa_datasources'):
+       for name, values in sorted(status.get(step, {}).items()):
+           datasource_data += counter_perfdata(name, values, DATASOURCE_STATS)
+
+   #Undertow listeners
+   undertow_data = ""
+   for step in ('http_listeners', 'https_listeners'):
+       for name, values in sorted(status.get(step, {}).items()):
+           undertow_data += counter_perfdata(name, values, LISTENER_STATS)
+
+   perfdata = "%s%s%s%s%s%s" % (memory_data,threads_data,gc_data,datasource_data,undertow_data,nagios_http.phase_perfdata(res))
 
    output = str(host + ":" + port + context) + " | " + perfdata
 
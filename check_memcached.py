@@ -3,7 +3,7 @@
 # ======================= SUMMARY ================================
 #
 # Program : check_memcached.py
-# Version : 0.5
+# Version : 0.11
 # Date    : Jul 07, 2019
 # Author  : Jan Souza - me@jansouza.com
 #
@@ -41,16 +41,29 @@
 #  [0.3 - Sep 2019] Ajust perfdata output
 #  [0.4 - Feb 2020] Ajust response time output
 #  [0.5 - Feb 2020] Fix response time Threshold
+#  [0.6 - Oct 2026] Phase timings (dns, connect, ttfb, body, parse), --phase selects where -T applies
+#  [0.7 - Oct 2026] Replace telnetlib with a raw-socket client that pipelines the stats commands
+#  [0.8 - Oct 2026] --metadump streams lru_crawler metadump into TTL, size per slab class and top-N aggregates
+#  [0.9 - Oct 2026] Per slab class table (stats slabs/items), -F fill and -E eviction thresholds on the worst class
+#  [0.10 - Oct 2026] -E evicted percent of the sets since the previous check per slab class (nagios_state.py)
+#  [0.11 - Oct 2026] Phase perfdata and --phase threshold from nagios_http
 #
 #  TODO
 #     (a) Support SASL Authentication
 #
 # ============================ START OF PROGRAM CODE =============================
+# Requires nagios_http.py (phase perfdata) and nagios_state.py (counter state
+# store) in the same directory
 
 import argparse
 import logging
 import os, sys, time
-import re, telnetlib
+import heapq
+from array import array
+import re, socket
+from urllib.parse import unquote
+import nagios_http
+import nagios_state
 
 # NAGIOS return codes :
 # https://nagios-plugins.org/doc/guidelines.html#AEN78
@@ -59,38 +72,136 @@ WARNING  = 1
 CRITICAL = 2
 UNKNOWN  = 3
 
+# The phases of nagios_http.PHASES measured on the raw socket (no TLS)
+PHASES = [phase for phase in nagios_http.PHASES if phase != 'tls']
+
 mylogger = logging.getLogger(__name__)
 
 class MemcachedStats:
+    """
+    Memcached client on a raw socket. Commands are written in one pipelined
+    request and the replies are split out of a reusable receive buffer.
+    stats() sends "stats", "stats slabs", "stats items" and "stats settings"
+    together, so slab_ids(), slabs() and settings() need no extra round trip.
+    """
 
     _client = None
     _key_regex = re.compile(r'ITEM (.*) \[(.*); (.*)\]')
-    _slab_regex = re.compile(r'STAT items:(.*):number')
-    _stat_regex = re.compile(r"STAT (.*) (.*)\r")
+    _slab_regex = re.compile(r'STAT items:(.*):number ')
+    _metadump_regex = re.compile(rb'key=(\S+) exp=(-?\d+) .*?cls=(\d+) size=(\d+)')
+    _errors = (b'ERROR', b'CLIENT_ERROR', b'SERVER_ERROR')
+
+    STATS_COMMANDS = ['stats', 'stats slabs', 'stats items', 'stats settings']
 
-    def __init__(self, host='localhost', port='11211', timeout=None, log_level=0):
+    def __init__(self, host='localhost', port='11211', timeout=None, log_level=0, bufsize=65536):
         self._host = host
-        self._port = port
+        self._port = int(port)
         self._timeout = timeout
         self.log_level = log_level
+        self._buf = bytearray()
+        self._chunk = memoryview(bytearray(bufsize))
+        self._replies = {}
+        self.times = dict((phase, 0.0) for phase in PHASES)
 
     @property
     def client(self):
         if self._client is None:
-            self._client = telnetlib.Telnet(self._host, self._port,self._timeout)
-            self._client.set_debuglevel(self.log_level)
+            start = time.monotonic()
+            infos = socket.getaddrinfo(self._host, self._port, 0, socket.SOCK_STREAM)
+            self.times['dns'] = time.monotonic() - start
+
+            start = time.monotonic()
+            for i, (family, socktype, proto, _, address) in enumerate(infos):
+                sock = socket.socket(family, socktype, proto)
+                sock.settimeout(self._timeout)
+                try:
+                    sock.connect(address)
+                    break
+                except OSError:
+                    sock.close()
+                    if i == len(infos) - 1:
+                        raise
+            self._client = sock
+            self.times['connect'] = time.monotonic() - start
         return self._client
 
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        self._buf = bytearray()
+
+    def _recv(self):
+        ' Append the next chunk from the socket to the receive buffer '
+        size = self.client.recv_into(self._chunk)
+        if not size:
+            raise EOFError("Connection closed by server")
+        self._buf += self._chunk[:size]
+
+    def _read_reply(self):
+        ' Remove the next reply (up to END or an error line) from the buffer '
+        pos = 0
+        while True:
+            eol = self._buf.find(b'\r\n', pos)
+            if eol < 0:
+                self._recv()
+                continue
+            line = bytes(self._buf[pos:eol])
+            if line == b'END' or (pos == 0 and line.startswith(self._errors)):
+                reply = bytes(self._buf[:eol + 2])
+                del self._buf[:eol + 2]
+                return reply.decode('utf-8', 'replace')
+            pos = eol + 2
+
+    def pipeline(self, cmds):
+        ' Write all commands in one request and return their replies in order '
+        client = self.client
+        request = "".join("%s\r\n" % cmd for cmd in cmds).encode('ascii')
+        if self.log_level:
+            mylogger.debug("memcached send: %r" % request)
+
+        start = time.monotonic()
+        client.sendall(request)
+        self._recv()
+        self.times['ttfb'] = time.monotonic() - start
+
+        start = time.monotonic()
+        replies = [self._read_reply() for cmd in cmds]
+        self.times['body'] = time.monotonic() - start
+
+        # Read every reply before raising, so the buffer stays in sync
+        for cmd, reply in zip(cmds, replies):
+            if reply.startswith(('ERROR', 'CLIENT_ERROR', 'SERVER_ERROR')):
+                raise ValueError("%s: %s" % (cmd, reply.strip()))
+        return replies
+
     def command(self, cmd):
-        ' Write a command to telnet and return the response '
-        self.client.write(("%s\n" % cmd).encode('ascii'))
-        return self.client.read_until(b'END').decode('ascii')
+        ' Write a command and return the response '
+        return self.pipeline([cmd])[0]
+
+    def refresh(self):
+        ' Fetch all the STATS_COMMANDS replies in one round trip '
+        self._replies = dict(zip(self.STATS_COMMANDS, self.pipeline(self.STATS_COMMANDS)))
+
+    def _reply(self, cmd):
+        if cmd not in self._replies:
+            self.refresh()
+        return self._replies[cmd]
+
+    def _stats(self, cmd):
+        ' Return a dict from a "STAT name value" reply '
+        stats = {}
+        for line in self._reply(cmd).split('\r\n'):
+            if line.startswith('STAT '):
+                name, _, value = line[5:].partition(' ')
+                stats[name] = value
+        return stats
 
     def key_details(self, sort=True, limit=100):
         ' Return a list of tuples containing keys and details '
         cmd = 'stats cachedump %s %s'
-        keys = [key for id in self.slab_ids()
-            for key in self._key_regex.findall(self.command(cmd % (id, limit)))]
+        replies = self.pipeline([cmd % (id, limit) for id in self.slab_ids()])
+        keys = [key for reply in replies for key in self._key_regex.findall(reply)]
         if sort:
             return sorted(keys)
         else:
@@ -102,11 +213,212 @@ class MemcachedStats:
 
     def slab_ids(self):
         ' Return a list of slab ids in use '
-        return self._slab_regex.findall(self.command('stats items'))
+        return self._slab_regex.findall(self._reply('stats items'))
+
+    def slabs(self):
+        ' Return a dict containing "stats slabs" '
+        return self._stats('stats slabs')
+
+    def settings(self):
+        ' Return a dict containing "stats settings" '
+        return self._stats('stats settings')
+
+    def slab_table(self):
+        ' Return a SlabTable from "stats slabs" and "stats items" '
+        return SlabTable(self._reply('stats slabs'), self._reply('stats items'))
 
     def stats(self):
         ' Return a dict containing memcached stats '
-        return dict(self._stat_regex.findall(self.command('stats')))
+        self.refresh()
+        start = time.monotonic()
+        stats = self._stats('stats')
+        self.times['parse'] = time.monotonic() - start
+        return stats
+
+    def metadump(self):
+        """
+        Yield (key, exp, cls, size) for every item of "lru_crawler metadump all",
+        one line at a time. Keys stay URL-encoded bytes. The generator must be
+        consumed to the end, or the connection closed, before the next command.
+        """
+        self.client.sendall(b'lru_crawler metadump all\r\n')
+        while True:
+            # Split every complete line received so far; keep the partial one
+            end = self._buf.rfind(b'\n') + 1
+            lines = bytes(self._buf[:end]).split(b'\n')
+            del self._buf[:end]
+            for line in lines[:-1]:
+                match = self._metadump_regex.match(line)
+                if match is None:
+                    line = line.rstrip(b'\r')
+                    if line == b'END':
+                        return
+                    raise ValueError("lru_crawler metadump: %s" % line.decode('ascii', 'replace'))
+                key, exp, cls, size = match.groups()
+                yield key, int(exp), int(cls), int(size)
+            self._recv()
+
+    def metadump_stats(self, top=10, now=None):
+        ' Stream "lru_crawler metadump all" into a MetadumpStats '
+        if now is None:
+            now = int(time.time())
+        aggregates = MetadumpStats(now, top)
+        for key, exp, cls, size in self.metadump():
+            aggregates.add(key, exp, cls, size)
+        return aggregates
+
+class SlabTable:
+    """
+    Per slab class figures from "stats slabs" and "stats items", kept as one
+    array per column with a row per class id in use.
+    """
+
+    FIELDS = ['chunk_size', 'total_chunks', 'used_chunks', 'free_chunks', 'number', 'evicted', 'evicted_nonzero', 'age', 'cmd_set']
+    # Lifetime counters of a class, saved to compute the eviction pressure between checks
+    COUNTERS = ['evicted', 'cmd_set']
+
+    def __init__(self, slabs, items):
+        rows = {}
+        for reply, prefix in ((slabs, 'STAT '), (items, 'STAT items:')):
+            for line in reply.split('\r\n'):
+                if not line.startswith(prefix):
+                    continue
+                name, _, value = line[len(prefix):].partition(' ')
+                id, sep, field = name.partition(':')
+                if sep and field in self.FIELDS:
+                    rows.setdefault(int(id), {})[field] = int(value)
+
+        self.ids = array('H', sorted(rows))
+        self.columns = {}
+        for field in self.FIELDS:
+            self.columns[field] = array('q', [rows[id].get(field, 0) for id in self.ids])
+        self.deltas = None
+
+    def counters(self):
+        ' Return the COUNTERS of every class, as "<field>_<id>" for nagios_state '
+        counters = {}
+        for field in self.COUNTERS:
+            for i, id in enumerate(self.ids):
+                counters["%s_%s" % (field, id)] = self.columns[field][i]
+        return counters
+
+    def __len__(self):
+        return len(self.ids)
+
+    def fill(self, i):
+        ' Percent of the chunks of the class in use '
+        used = self.columns['used_chunks'][i]
+        total = self.columns['total_chunks'][i] or used + self.columns['free_chunks'][i]
+        if not total:
+            return 0.0
+        return round(float(used) * 100 / total, 2)
+
+    def pressure(self, i):
+        """
+        Percent of the sets of the class since the previous check that evicted
+        an item, from the deltas of counters(). 0 without a previous check.
+        """
+        if self.deltas is None:
+            return 0.0
+        id = self.ids[i]
+        evicted = self.deltas.get("evicted_%s" % id, 0)
+        sets = self.deltas.get("cmd_set_%s" % id, 0)
+        if not sets:
+            return 0.0
+        return min(round(float(evicted) * 100 / sets, 2), 100.0)
+
+    def worst(self, metric):
+        ' Return (index, value) of the class with the highest fill or pressure '
+        worst = (None, 0.0)
+        for i in range(len(self.ids)):
+            value = metric(i)
+            if worst[0] is None or value > worst[1]:
+                worst = (i, value)
+        return worst
+
+    def describe(self, i):
+        column = self.columns
+        return "class %s (%sB chunks): fill %s%% (%s used, %s free), evicted %s%% of the sets since the previous check (%s total, %s nonzero), age %ss" % (
+            self.ids[i], column['chunk_size'][i], self.fill(i), column['used_chunks'][i], column['free_chunks'][i],
+            self.pressure(i), column['evicted'][i], column['evicted_nonzero'][i], column['age'][i])
+
+class MetadumpStats:
+    """
+    Fold the items of "lru_crawler metadump all" into fixed size aggregates:
+    a TTL distribution, a size histogram per slab class and the top-N
+    largest keys. Memory use does not depend on the number of items.
+    """
+
+    TTL_BUCKETS = [(60, '1m'), (3600, '1h'), (86400, '1d'), (604800, '7d')]
+    TTL_LABELS = ['never', 'expired'] + [label for _, label in TTL_BUCKETS] + ['more']
+    SIZE_BUCKETS = 15  # powers of two, <64 bytes up to >=512K
+
+    def __init__(self, now, top=10):
+        self.now = now
+        self.top = top
+        self.items = 0
+        self.bytes = 0
+        self.ttl = dict((label, 0) for label in self.TTL_LABELS)
+        self.sizes = {}
+        self._largest = []
+
+    def add(self, key, exp, cls, size):
+        self.items += 1
+        self.bytes += size
+
+        if exp < 0:
+            self.ttl['never'] += 1
+        else:
+            ttl = exp - self.now
+            if ttl <= 0:
+                self.ttl['expired'] += 1
+            else:
+                for limit, label in self.TTL_BUCKETS:
+                    if ttl < limit:
+                        self.ttl[label] += 1
+                        break
+                else:
+                    self.ttl['more'] += 1
+
+        histogram = self.sizes.get(cls)
+        if histogram is None:
+            histogram = self.sizes[cls] = [0] * self.SIZE_BUCKETS
+        histogram[min(max(size.bit_length() - 6, 0), self.SIZE_BUCKETS - 1)] += 1
+
+        if len(self._largest) < self.top:
+            heapq.heappush(self._largest, (size, key, cls))
+        elif size > self._largest[0][0]:
+            heapq.heapreplace(self._largest, (size, key, cls))
+
+    def largest(self):
+        ' Return the top-N (size, key, cls) tuples, largest first, with decoded keys '
+        return [(size, unquote(key.decode('utf-8', 'replace')), cls)
+            for size, key, cls in sorted(self._largest, reverse=True)]
+
+    def size_label(self, bucket):
+        if bucket == 0:
+            return "<64"
+        if bucket == self.SIZE_BUCKETS - 1:
+            return ">=%sK" % (2 ** (bucket + 5) // 1024)
+        size = 2 ** (bucket + 6)
+        if size >= 1024:
+            return "<%sK" % (size // 1024)
+        return "<%s" % size
+
+    def perfdata(self):
+        return " ".join("ttl_%s=%s" % (label, self.ttl[label]) for label in self.TTL_LABELS)
+
+    def report(self):
+        ' Return the long output lines '
+        lines = ["Top %s largest keys:" % self.top]
+        for size, key, cls in self.largest():
+            lines.append("  %s %sB class %s" % (key, size, cls))
+        lines.append("Size histogram per slab class:")
+        for cls in sorted(self.sizes):
+            histogram = self.sizes[cls]
+            buckets = ["%s:%s" % (self.size_label(i), count) for i, count in enumerate(histogram) if count]
+            lines.append("  class %s: %s" % (cls, " ".join(buckets)))
+        return lines
 
 def debug_factory(logger, debug_level):
    """
@@ -128,30 +440,38 @@ def convert_to_days(seconds):
     return "%s days, %s hours, %s minutes" % (days, hours, minutes)
 
 
-def get_args():
+def get_args(argv=None):
    """
    Supports the command-line arguments listed below.
    """
-   parser = argparse.ArgumentParser(description="Memcache Check for Nagios")
+   parser = argparse.ArgumentParser(prog=os.path.basename(__file__), description="Memcache Check for Nagios")
    parser._optionals.title = "Options"
 
    parser.add_argument('-H', nargs=1, required=False, help='Hostname or IP Address to check', dest='host', type=str, default=['127.0.0.1'])
    parser.add_argument('-p', nargs=1, required=False, help='port number (default: 11211)', dest='port', type=str, default=['11211'])
 
    parser.add_argument('-T', nargs=2, required=False, help='Measure the output connection response time in seconds -T [WARN,CRIT] \n Ex.: -T 0.1 0.5', dest='response_time', type=str)
+   parser.add_argument('--phase', nargs=1, required=False, help='Apply -T to one phase of the response time (default: total)', dest='phase', type=str, default=['total'], choices=['total'] + PHASES)
    parser.add_argument('-U', nargs=2, required=False, help='This calculates percent of space in use, which is bytes/limit_maxbytes -U [WARN,CRIT] \n Ex.: -U 95 98', dest='utilization', type=str)
 
+   parser.add_argument('-F', nargs=2, required=False, help='Percent of chunks in use in the fullest slab class -F [WARN,CRIT] \n Ex.: -F 95 99', dest='slab_fill', type=str)
+   parser.add_argument('-E', nargs=2, required=False, help='Percent of the sets since the previous check that evicted an item, in the worst slab class -E [WARN,CRIT] \n Ex.: -E 1 5', dest='slab_evicted', type=str)
+   parser.add_argument('--metadump', required=False, help='Stream "lru_crawler metadump all" and report TTL distribution, size histogram per slab class and largest keys', dest='metadump', action='store_true')
+   parser.add_argument('--top', nargs=1, required=False, help='Number of largest keys listed by --metadump (default: 10)', dest='top', type=int, default=[10])
+
    parser.add_argument('-t', nargs=1, required=False, help='Connection Timeout', dest='timeout', type=int)
    parser.add_argument('-v', '--verbose', required=False, help='Enable verbose output', dest='verbose', action='store_true')
 
-   args = parser.parse_args()
+   args = parser.parse_args(argv)
+   if args.top[0] < 1:
+      parser.error("argument --top: must be at least 1")
    return args
 
 
-def main():
+def main(argv=None):
 
    # Handling arguments
-   args = get_args()
+   args = get_args(argv)
 
    host = args.host[0]
    port = args.port[0]
@@ -188,21 +508,31 @@ def main():
    ############
    #GET DATA
    ###########
-   telnet_debug = 0
+   socket_debug = 0
    if (verbose):
-     telnet_debug = 1
+     socket_debug = 1
 
    resp_time=0
    try:
      mylogger.debug("Get Stats - HOSTNAME: %s PORT: %s TIMEOUT: %s" % (host,port,timeout))
-     start = time.time()
+     start = time.monotonic()
 
-     mem = MemcachedStats(host, port, timeout,telnet_debug)
+     mem = MemcachedStats(host, port, timeout,socket_debug)
      stats = mem.stats()
-     end = time.time()
+     end = time.monotonic()
+     mylogger.debug(mem.times)
+     slabs = mem.slab_table()
      response_time = end - start
      resp_time = round(float(response_time), 6)
 
+     metadump = None
+     if args.metadump:
+        start = time.monotonic()
+        metadump = mem.metadump_stats(args.top[0], int(stats.get("time", time.time())))
+        metadump_time = time.monotonic() - start
+        mylogger.debug("metadump: %s items in %.6fs" % (metadump.items,metadump_time))
+     mem.close()
+
      if (stats is None) :
         mylogger.unkown("response_time %s" % resp_time)
         sys.exit(UNKNOWN)
@@ -233,6 +563,24 @@ def main():
    utilization = round( float(bytes) * 100 / float(limit_maxbytes), 2);
    mylogger.debug("bytes: %s limit_maxbytes: %s" % (bytes,limit_maxbytes))
 
+   #slab classes, evictions since the previous check (nagios_state.py)
+   current = nagios_state.sample(slabs.counters())
+   state_key = "%s:%s slabs" % (host,port)
+   previous = nagios_state.load("check_memcached", state_key)
+   try:
+       nagios_state.save("check_memcached", state_key, current)
+   except OSError as ex:
+       mylogger.debug("cannot save state: %s" % ex)
+   elapsed, slabs.deltas = nagios_state.interval(previous, current, int(uptime))
+   if slabs.deltas is not None:
+       mylogger.debug("slab evictions over %.1fs" % elapsed)
+
+   fill_index, slab_fill = slabs.worst(slabs.fill)
+   evicted_index, slab_evicted = slabs.worst(slabs.pressure)
+   if fill_index is not None:
+      mylogger.debug("fullest slab %s" % slabs.describe(fill_index))
+      mylogger.debug("most evicted slab %s" % slabs.describe(evicted_index))
+
    #others
    evictions = stats["evictions"]
    curr_connections = stats["curr_connections"]
@@ -250,7 +598,13 @@ def main():
    if args.response_time:
       resp_warn_data = round(float(response_warn), 6)
       resp_crit_data = round(float(response_crit), 6)
-   resp_time_data = str(resp_time) + "s;" + str(resp_warn_data) + ";" + str(resp_crit_data) + ";0.000000"
+   phase = args.phase[0]
+   if phase == 'total':
+      resp_time_data = str(resp_time) + "s;" + str(resp_warn_data) + ";" + str(resp_crit_data) + ";0.000000"
+      phase_data = nagios_http.times_perfdata(mem.times)
+   else:
+      resp_time_data = str(resp_time) + "s"
+      phase_data = nagios_http.times_perfdata(mem.times, phase, resp_warn_data, resp_crit_data)
 
    #Utilization
    uti_warn_data = ""
@@ -260,11 +614,29 @@ def main():
       uti_crit_data = round(float(utilization_crit), 2)
    uti_data = str(utilization) + "%;" + str(uti_warn_data) + ";" + str(uti_crit_data)
 
+   #Slab classes
+   fill_warn_data = ""
+   fill_crit_data = ""
+   if args.slab_fill:
+      fill_warn_data = round(float(args.slab_fill[0]), 2)
+      fill_crit_data = round(float(args.slab_fill[1]), 2)
+   evicted_warn_data = ""
+   evicted_crit_data = ""
+   if args.slab_evicted:
+      evicted_warn_data = round(float(args.slab_evicted[0]), 2)
+      evicted_crit_data = round(float(args.slab_evicted[1]), 2)
+   slab_data = "slab_classes=%s worst_slab_fill=%s%%;%s;%s worst_slab_evicted=%s%%;%s;%s" % (len(slabs),slab_fill,fill_warn_data,fill_crit_data,slab_evicted,evicted_warn_data,evicted_crit_data)
+
    hit_rate_str = str(hit_rate) + "%"
 
-   perfdata= "response_time=%s hit_rate=%s curr_connections=%s utilization=%s evictions=%s" % (resp_time_data,hit_rate_str,curr_connections,uti_data,evictions)
+   perfdata= "response_time=%s hit_rate=%s curr_connections=%s utilization=%s evictions=%s %s %s" % (resp_time_data,hit_rate_str,curr_connections,uti_data,evictions,slab_data,phase_data)
+
+   if metadump is not None:
+      perfdata += " items=%s metadump_time=%.6fs %s" % (metadump.items,metadump_time,metadump.perfdata())
 
    output = memcache_info + " | " + perfdata;
+   if metadump is not None:
+      output += "\n" + "\n".join(metadump.report())
 
    ############
    #Threshold
@@ -277,11 +649,13 @@ def main():
 	   resp_warn = round(float(response_warn), 6)
 	   resp_crit = round(float(response_crit), 6)
 
-	   if (resp_time >= resp_crit) :
-                mylogger.critical("response_time %s > %s" % (resp_time,resp_crit) + " - " + output )
+	   time_name, checked_time = nagios_http.phase_threshold(phase, resp_time, mem.times)
+
+	   if (checked_time >= resp_crit) :
+                mylogger.critical("%s %s > %s" % (time_name,checked_time,resp_crit) + " - " + output )
                 sys.exit(CRITICAL)
-	   elif (resp_time >= resp_warn) :
-	        mylogger.warning("response_time %s > %s" % (resp_time,resp_warn) + " - " + output )
+	   elif (checked_time >= resp_warn) :
+	        mylogger.warning("%s %s > %s" % (time_name,checked_time,resp_warn) + " - " + output )
 	        sys.exit(WARNING)
 
    #Utilization
@@ -298,6 +672,27 @@ def main():
 	       mylogger.warning("utilization %s > %s" % (utilization,uti_warn) + " - " + output )
 	       sys.exit(WARNING)
 
+   #Slab classes
+   if args.slab_fill and fill_index is not None:
+	   mylogger.debug("Slab Fill WARN: %s, CRIT %s " % (fill_warn_data,fill_crit_data) )
+
+	   if (slab_fill >= fill_crit_data) :
+	       mylogger.critical("slab %s - " % slabs.describe(fill_index) + output )
+	       sys.exit(CRITICAL)
+	   elif (slab_fill >= fill_warn_data) :
+	       mylogger.warning("slab %s - " % slabs.describe(fill_index) + output )
+	       sys.exit(WARNING)
+
+   if args.slab_evicted and evicted_index is not None:
+	   mylogger.debug("Slab Evicted WARN: %s, CRIT %s " % (evicted_warn_data,evicted_crit_data) )
+
+	   if (slab_evicted >= evicted_crit_data) :
+	       mylogger.critical("slab %s - " % slabs.describe(evicted_index) + output )
+	       sys.exit(CRITICAL)
+	   elif (slab_evicted >= evicted_warn_data) :
+	       mylogger.warning("slab %s - " % slabs.describe(evicted_index) + output )
+	       sys.exit(WARNING)
+
    mylogger.info(output)
    sys.exit(OK)
 
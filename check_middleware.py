@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+#
+# ======================= SUMMARY ================================
+#
+# Program : check_middleware.py
+# Version : 0.1
+# Date    : Oct 17, 2026
+# Author  : Jan Souza - me@jansouza.com
+#
+# Command line Ex.: ./check_middleware.py check_apache -H 127.0.0.1
+#                   ./check_apache -H 127.0.0.1   (symlink to check_middleware.py)
+#
+# Thin launcher for check_daemon.py. It forwards argv to the resident daemon
+# over its Unix socket and relays stdout, stderr and the exit code. It only
+# imports os, sys and socket so it starts in a few milliseconds. When the
+# daemon is not running, it executes the matching check_*.py directly.
+#
+# ======================= NAGIOS CONFIGURATION =====================
+#
+# 1. Install a symlink per plugin next to check_middleware.py
+#
+#    cd $USER1$ && for p in apache nginx tomcat tomcat_dbcp jboss solr redis memcached ; do
+#        ln -s check_middleware.py check_$p ; done
+#
+# 2. Change only the binary name in the existing command definitions
+#
+# define command {
+#    command_name    check_apache_status
+#    command_line    $USER1$/check_apache -H $HOSTADDRESS$ -u $ARG1$ -T $ARG2$ -C $ARG3$ -I $ARG4$ $ARG5$
+# }
+#
+# ======================= VERSION HISTORY and TODO ================================
+#
+#
+#  [0.1 - Oct 2026] First version of the code.
+#
+#
+#  TODO
+#     (a)
+#
+# ============================ START OF PROGRAM CODE =============================
+
+import os, sys
+import socket
+
+UNKNOWN  = 3
+
+DEFAULT_SOCKET = '/tmp/nagios_check_daemon.sock'
+DEFAULT_TIMEOUT = 60
+
+def plugin_argv(argv):
+    """
+    Return the plugin argv, taking the plugin name from the symlink name or,
+    when called as check_middleware, from the first argument.
+    """
+    name = os.path.basename(argv[0])
+    if name.endswith('.py'):
+        name = name[:-3]
+    if name == 'check_middleware':
+        if len(argv) < 2:
+            return None
+        argv = argv[1:]
+        name = os.path.basename(argv[0])
+        if name.endswith('.py'):
+            name = name[:-3]
+    return [name] + argv[1:]
+
+def run_direct(argv):
+    ' Replace this process with the check_*.py plugin '
+    path = os.path.join(os.path.dirname(os.path.realpath(__file__)), argv[0] + '.py')
+    os.execv(sys.executable, [sys.executable, path] + argv[1:])
+
+def run_daemon(argv, path, timeout):
+    ' Send argv to check_daemon.py and return (exit_code, stdout, stderr) '
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    client.connect(path)
+
+    client.sendall('\0'.join(argv).encode('utf-8'))
+    client.shutdown(socket.SHUT_WR)
+
+    chunks = []
+    while True:
+        data = client.recv(65536)
+        if not data:
+            break
+        chunks.append(data)
+    client.close()
+
+    reply = b''.join(chunks)
+    header, _, body = reply.partition(b'\n')
+    code, length = header.split()
+    length = int(length)
+    return int(code), body[:length], body[length:]
+
+def main():
+   argv = plugin_argv(sys.argv)
+   if argv is None:
+       sys.stdout.write("UNKOWN - usage: check_middleware.py check_<plugin> [args]\n")
+       sys.exit(UNKNOWN)
+
+   path = os.environ.get('CHECK_DAEMON_SOCKET', DEFAULT_SOCKET)
+   timeout = float(os.environ.get('CHECK_DAEMON_TIMEOUT', DEFAULT_TIMEOUT))
+
+   try:
+       code, out, err = run_daemon(argv, path, timeout)
+   except (OSError, ValueError) as ex:
+       # Daemon down (no socket, connection refused) or a broken reply
+       if isinstance(ex, socket.timeout):
+           sys.stdout.write("UNKOWN - check_daemon timeout after %ss\n" % timeout)
+           sys.exit(UNKNOWN)
+       run_direct(argv)
+
+   sys.stdout.buffer.write(out)
+   sys.stderr.buffer.write(err)
+   sys.exit(code)
+
+if __name__ == "__main__":
+   main()
@@ -3,7 +3,7 @@
 # ======================= SUMMARY ================================
 #
 # Program : check_nginx.py
-# Version : 0.3
+# Version : 0.7
 # Date    : Jul 07, 2019
 # Author  : Jan Souza - me@jansouza.com
 #
@@ -39,20 +39,23 @@
 #  [0.1 - Jul 2019] First version of the code.
 #  [0.2 - Sep 2019] Fix request timeout
 #  [0.3 - May 2020] Fix Request Log Level
+#  [0.4 - Oct 2026] Use shared asyncio fetch layer (nagios_http.py) instead of requests
+#  [0.5 - Oct 2026] Add connect_time and request_time perfdata
+#  [0.6 - Oct 2026] Phase timings (dns, connect, tls, ttfb, body, parse), --phase selects where -T applies
+#  [0.7 - Oct 2026] Requests, accepts and dropped connections per second since the previous check, -r thresholds
 #
 #  TODO
 #     (a)
 #
 # ============================ START OF PROGRAM CODE =============================
-# sudo pip install requests | sudo easy_install requests
-# https://pypi.org/project/requests/
+# Requires nagios_http.py (shared HTTP fetch layer) and nagios_state.py
+# (counter state store) in the same directory
 
 import argparse
 import logging
 import os, sys, time
-import requests
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+import nagios_http
+import nagios_state
 
 # NAGIOS return codes :
 # https://nagios-plugins.org/doc/guidelines.html#AEN78
@@ -61,6 +64,9 @@ WARNING  = 1
 CRITICAL = 2
 UNKNOWN  = 3
 
+# Rates per second since the previous check; dropped is accepts - handled
+RATES = ['requests', 'accepts', 'dropped']
+
 mylogger = logging.getLogger(__name__)
 
 def debug_factory(logger, debug_level):
@@ -73,11 +79,11 @@ def debug_factory(logger, debug_level):
        logger._log(debug_level, msg, args, kwargs)
    return custom_debug
 
-def get_args():
+def get_args(argv=None):
    """
    Supports the command-line arguments listed below.
    """
-   parser = argparse.ArgumentParser(description="NGINX Status Check for Nagios")
+   parser = argparse.ArgumentParser(prog=os.path.basename(__file__), description="NGINX Status Check for Nagios")
    parser._optionals.title = "Options"
 
    parser.add_argument('-H', nargs=1, required=False, help='Hostname or IP Address to check', dest='host', type=str, default=['127.0.0.1'])
@@ -85,20 +91,26 @@ def get_args():
    parser.add_argument('-u', nargs=1, required=True, help='Status URL Context', dest='context', type=str)
 
    parser.add_argument('-T', nargs=2, required=False, help='Measure the output connection response time in seconds -T [WARN,CRIT] \n Ex.: -T 0.1 0.5', dest='response_time', type=str)
+   parser.add_argument('--phase', nargs=1, required=False, help='Apply -T to one phase of the response time (default: total)', dest='phase', type=str, default=['total'], choices=['total'] + nagios_http.PHASES)
    parser.add_argument('-C', nargs=2, required=False, help='Measure the number of clients connections currently -C [WARN,CRIT] \n Ex.: -C 30 50', dest='current_conn', type=str)
 
+   parser.add_argument('-r', nargs=3, required=False, help='Threshold on a rate per second since the previous check -r [NAME,WARN,CRIT], repeat for more rates. NAME is one of %s. Ex.: -r requests 500 1000 -r dropped 1 10' % ", ".join(RATES), dest='rates', type=str, action='append', metavar=('NAME', 'WARN', 'CRIT'))
+
    parser.add_argument('--ssl', required=False, help='Enable SSL Request', dest='ssl', action='store_true')
 
    parser.add_argument('-t', nargs=1, required=False, help='Connection Timeout', dest='timeout', type=int)
    parser.add_argument('-v', '--verbose', required=False, help='Enable verbose output', dest='verbose', action='store_true')
 
-   args = parser.parse_args()
+   args = parser.parse_args(argv)
+   for rate in args.rates or []:
+      if rate[0] not in RATES:
+         parser.error("argument -r: invalid rate name '%s' (choose from %s)" % (rate[0], ", ".join(RATES)))
    return args
 
 
-def main():
+def main(argv=None):
    # Handling arguments
-   args = get_args()
+   args = get_args(argv)
 
    host = args.host[0]
    port = args.port[0]
@@ -129,11 +141,6 @@ def main():
    else:
        log_level = logging.INFO
 
-   #Request Debug Level
-   logging.getLogger("urllib3").setLevel(logging.WARNING)
-   if verbose:
-       logging.getLogger("urllib3").setLevel(logging.DEBUG)
-
    # Add custom level unknown
    logging.addLevelName(logging.DEBUG+1, 'UNKOWN')
    setattr(mylogger, 'unkown', debug_factory(mylogger, logging.DEBUG+1))
@@ -152,7 +159,7 @@ def main():
    status = {}
    try:
      mylogger.debug("Get Stats - HOSTNAME: %s PORT: %s CONTEXT: %s TIMEOUT: %s" % (host,port,context,timeout))
-     start = time.time()
+     start = time.monotonic()
 
      url = "http://"
      if ssl:
@@ -160,7 +167,7 @@ def main():
 
      url += host + ":" + port + context
      mylogger.debug("URL: %s" % (url))
-     res = requests.get(url, verify=False, timeout=timeout)
+     res = nagios_http.get(url, verify=False, timeout=timeout)
 
      if res.status_code != 200:
         mylogger.critical(str(res.status_code) + " Found")
@@ -168,7 +175,7 @@ def main():
 
      html = res.text
 
-     end = time.time()
+     end = time.monotonic()
      response_time = end - start
      resp_time = round(float(response_time), 6)
 
@@ -180,6 +187,7 @@ def main():
      mylogger.critical(ex)
      sys.exit(CRITICAL)
 
+   parse_start = time.monotonic()
    lines = html.split('\n')
 
    _, value = lines[0].split(':')
@@ -198,6 +206,7 @@ def main():
    status['reading'] = reading
    status['writing'] = writing
    status['waiting'] = waiting
+   res.parse_time = time.monotonic() - parse_start
 
    mylogger.debug(status)
 
@@ -206,6 +215,21 @@ def main():
    except ZeroDivisionError:
        requests_per_conn = 0.0
 
+   #rates since the previous check, skipped after a restart (counters went down)
+   current = nagios_state.sample({'accepts': accepts, 'handled': handled, 'requests': request})
+   previous = nagios_state.load("check_nginx", url)
+   try:
+       nagios_state.save("check_nginx", url, current)
+   except OSError as ex:
+       mylogger.debug("cannot save state: %s" % ex)
+
+   rates = None
+   elapsed, deltas = nagios_state.interval(previous, current)
+   if deltas is not None:
+       deltas['dropped'] = max(deltas['accepts'] - deltas['handled'], 0)
+       rates = nagios_state.per_second(deltas, elapsed)
+       mylogger.debug("rates over %.1fs: %s" % (elapsed,rates))
+
    ############
    #perfdata
    ###########
@@ -217,7 +241,13 @@ def main():
    if args.response_time:
       resp_warn_data = round(float(response_warn), 6)
       resp_crit_data = round(float(response_crit), 6)
-   resp_time_data = str(resp_time) + ";" + str(resp_warn_data) + ";" + str(resp_crit_data) + ";0.000000"
+   phase = args.phase[0]
+   if phase == 'total':
+      resp_time_data = str(resp_time) + ";" + str(resp_warn_data) + ";" + str(resp_crit_data) + ";0.000000"
+      phase_data = nagios_http.phase_perfdata(res)
+   else:
+      resp_time_data = str(resp_time)
+      phase_data = nagios_http.phase_perfdata(res, phase, resp_warn_data, resp_crit_data)
 
    #Currnet Connections
    conn_warn_data = ""
@@ -227,9 +257,15 @@ def main():
       conn_crit_data = current_conn_crit
    current_conn_data = str(active) + ";" + str(conn_warn_data) + ";" + str(conn_crit_data) + ";0"
 
-   perfdata = "response_time=%s active=%s requests_per_conn=%s" % (resp_time_data,current_conn_data,requests_per_conn)
+   perfdata = "response_time=%s active=%s requests_per_conn=%s %s" % (resp_time_data,current_conn_data,requests_per_conn,phase_data)
+
+   if rates is not None:
+      rate_thresholds = dict((rate[0], rate[1:]) for rate in args.rates or [])
+      for name in RATES:
+         warn, crit = rate_thresholds.get(name, ["", ""])
+         perfdata += " %s_per_sec=%s;%s;%s" % (name,rates[name],warn,crit)
 
-   output = str(res.request.url) + " - " + str(res.status_code) + " | " + perfdata
+   output = str(res.url) + " - " + str(res.status_code) + " | " + perfdata
 
    ############
    #Threshold
@@ -242,11 +278,13 @@ def main():
 	   resp_warn = round(float(response_warn), 6)
 	   resp_crit = round(float(response_crit), 6)
 
-	   if (resp_time >= resp_crit) :
-                mylogger.critical("response_time %s > %s" % (resp_time,resp_crit) + " - " + output )
+	   time_name, checked_time = nagios_http.phase_threshold(phase, resp_time, nagios_http.phase_times(res))
+
+	   if (checked_time >= resp_crit) :
+                mylogger.critical("%s %s > %s" % (time_name,checked_time,resp_crit) + " - " + output )
                 sys.exit(CRITICAL)
-	   elif (resp_time >= resp_warn) :
-	        mylogger.warning("response_time %s > %s" % (resp_time,resp_warn) + " - " + output )
+	   elif (checked_time >= resp_warn) :
+	        mylogger.warning("%s %s > %s" % (time_name,checked_time,resp_warn) + " - " + output )
 	        sys.exit(WARNING)
 
    #Current Connections
@@ -260,6 +298,18 @@ def main():
 	       mylogger.warning("Current Connections %s > %s" % (active,current_conn_warn) + " - " + output )
 	       sys.exit(WARNING)
 
+   #Rates, skipped on the first check and after a restart
+   if args.rates and rates is not None:
+	   for name, warn, crit in args.rates:
+	       mylogger.debug("Rate %s: %s WARN: %s, CRIT %s " % (name,rates[name],warn,crit) )
+
+	       if (rates[name] >= float(crit)) :
+	           mylogger.critical("%s_per_sec %s > %s" % (name,rates[name],crit) + " - " + output )
+	           sys.exit(CRITICAL)
+	       elif (rates[name] >= float(warn)) :
+	           mylogger.warning("%s_per_sec %s > %s" % (name,rates[name],warn) + " - " + output )
+	           sys.exit(WARNING)
+
 
    mylogger.info(output)
    sys.exit(OK)
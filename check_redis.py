@@ -3,7 +3,7 @@
 # ======================= SUMMARY ================================
 #
 # Program : check_redis.py
-# Version : 0.1
+# Version : 0.4
 # Date    : Jul 07, 2019
 # Author  : Jan Souza - me@jansouza.com
 #
@@ -37,6 +37,9 @@
 #
 #
 #  [0.1 - Jul 2019] First version of the code.
+#  [0.2 - Oct 2026] INFO over a raw socket (no redis-py), phase timings, --phase selects where -T applies
+#  [0.3 - Oct 2026] Rates since the previous check (nagios_state.py): hit rate, ops, evictions, expirations, net I/O, -r thresholds
+#  [0.4 - Oct 2026] Phase perfdata and --phase threshold from nagios_http
 #
 #
 #  TODO
@@ -47,14 +50,16 @@
 #         without directly specifying it
 #
 # ============================ START OF PROGRAM CODE =============================
-#
-# sudo pip install redis | sudo easy_install redis
-# https://pypi.org/project/redis/
+# Requires nagios_http.py (phase perfdata) and nagios_state.py (counter state
+# store) in the same directory
 
 import argparse
 import logging
 import os, sys, time
-import redis
+import socket
+
+import nagios_http
+import nagios_state
 
 # NAGIOS return codes :
 # https://nagios-plugins.org/doc/guidelines.html#AEN78
@@ -63,8 +68,111 @@ WARNING  = 1
 CRITICAL = 2
 UNKNOWN  = 3
 
+# The phases of nagios_http.PHASES measured on the raw socket (no TLS)
+PHASES = [phase for phase in nagios_http.PHASES if phase != 'tls']
+
+# Rate name -> INFO counter, reported per second since the previous check
+RATE_COUNTERS = [('ops', 'total_commands_processed'), ('evicted_keys', 'evicted_keys'),
+                 ('expired_keys', 'expired_keys'), ('net_input_bytes', 'total_net_input_bytes'),
+                 ('net_output_bytes', 'total_net_output_bytes')]
+RATES = ['hit_rate'] + [name for name, _ in RATE_COUNTERS]
+
 mylogger = logging.getLogger(__name__)
 
+class RedisError(Exception):
+    pass
+
+class RedisInfo:
+    """
+    Minimal Redis client on a raw socket that runs INFO and records the time
+    of each phase (dns, connect, ttfb, body, parse) with a monotonic clock.
+    """
+
+    def __init__(self, host='localhost', port='6379', timeout=None):
+        self._host = host
+        self._port = int(port)
+        self._timeout = timeout
+        self.times = dict((phase, 0.0) for phase in PHASES)
+
+    def connect(self):
+        ' Resolve the host and open the TCP connection '
+        start = time.monotonic()
+        infos = socket.getaddrinfo(self._host, self._port, 0, socket.SOCK_STREAM)
+        self.times['dns'] = time.monotonic() - start
+
+        start = time.monotonic()
+        for i, (family, socktype, proto, _, address) in enumerate(infos):
+            sock = socket.socket(family, socktype, proto)
+            sock.settimeout(self._timeout)
+            try:
+                sock.connect(address)
+                break
+            except OSError:
+                sock.close()
+                if i == len(infos) - 1:
+                    raise
+        self.times['connect'] = time.monotonic() - start
+        return sock
+
+    def info(self):
+        ' Return a dict containing the INFO reply '
+        sock = self.connect()
+        try:
+            start = time.monotonic()
+            sock.sendall(b'INFO\r\n')
+            buf = sock.recv(65536)
+            self.times['ttfb'] = time.monotonic() - start
+
+            start = time.monotonic()
+            while b'\r\n' not in buf:
+                data = sock.recv(65536)
+                if not data:
+                    raise RedisError("Connection closed by server")
+                buf += data
+            header, _, body = buf.partition(b'\r\n')
+            if header[:1] == b'-':
+                raise RedisError(header[1:].decode('utf-8', 'replace'))
+
+            length = int(header[1:])
+            while len(body) < length:
+                data = sock.recv(65536)
+                if not data:
+                    raise RedisError("Connection closed by server")
+                body += data
+            self.times['body'] = time.monotonic() - start
+        finally:
+            sock.close()
+
+        start = time.monotonic()
+        stats = parse_info(body[:length].decode('utf-8', 'replace'))
+        self.times['parse'] = time.monotonic() - start
+        return stats
+
+def info_value(value):
+    ' Convert an INFO value to int, float or a dict for "k=v,k=v" values '
+    if '=' in value:
+        items = {}
+        for item in value.split(','):
+            key, _, sub_value = item.rpartition('=')
+            items[key] = info_value(sub_value)
+        return items
+    try:
+        if '.' in value:
+            return float(value)
+        return int(value)
+    except ValueError:
+        return value
+
+def parse_info(text):
+    ' Parse the INFO reply into a dict '
+    stats = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        key, _, value = line.partition(':')
+        stats[key] = info_value(value)
+    return stats
+
 def debug_factory(logger, debug_level):
    """
    Decorate logger in order to add custom levels for Nagios
@@ -85,29 +193,35 @@ def convert_to_days(seconds):
     return "%s days, %s hours, %s minutes" % (days, hours, minutes)
 
 
-def get_args():
+def get_args(argv=None):
    """
    Supports the command-line arguments listed below.
    """
-   parser = argparse.ArgumentParser(description="Redis Check for Nagios")
+   parser = argparse.ArgumentParser(prog=os.path.basename(__file__), description="Redis Check for Nagios")
    parser._optionals.title = "Options"
 
    parser.add_argument('-H', nargs=1, required=False, help='Hostname or IP Address to check', dest='host', type=str, default=['127.0.0.1'])
    parser.add_argument('-p', nargs=1, required=False, help='port number (default: 6379)', dest='port', type=str, default=['6379'])
 
    parser.add_argument('-T', nargs=2, required=False, help='Measure the output connection response time in seconds -T [WARN,CRIT] \n Ex.: -T 0.1 0.5', dest='response_time', type=str)
+   parser.add_argument('--phase', nargs=1, required=False, help='Apply -T to one phase of the response time (default: total)', dest='phase', type=str, default=['total'], choices=['total'] + PHASES)
    parser.add_argument('-S', nargs=2, required=False, help='Check the number of seconds since the last save -S [WARN,CRIT]. Ex. -S 3600 86400', dest='last_save_time', type=str)
 
+   parser.add_argument('-r', nargs=3, required=False, help='Threshold on a rate since the previous check -r [NAME,WARN,CRIT], repeat for more rates. NAME is one of %s; hit_rate is a percent and alerts below WARN/CRIT, the others are per second. Ex.: -r hit_rate 90 80 -r evicted_keys 10 100' % ", ".join(RATES), dest='rates', type=str, action='append', metavar=('NAME', 'WARN', 'CRIT'))
+
    parser.add_argument('-t', nargs=1, required=False, help='Connection Timeout', dest='timeout', type=int)
    parser.add_argument('-v', '--verbose', required=False, help='Enable verbose output', dest='verbose', action='store_true')
 
-   args = parser.parse_args()
+   args = parser.parse_args(argv)
+   for rate in args.rates or []:
+      if rate[0] not in RATES:
+         parser.error("argument -r: invalid rate name '%s' (choose from %s)" % (rate[0], ", ".join(RATES)))
    return args
 
 
-def main():
+def main(argv=None):
    # Handling arguments
-   args = get_args()
+   args = get_args(argv)
 
    host = args.host[0]
    port = args.port[0]
@@ -148,11 +262,12 @@ def main():
    resp_time=0
    try:
      mylogger.debug("Get Stats - HOSTNAME: %s PORT: %s TIMEOUT: %s" % (host,port,timeout))
-     start = time.time()
-     client = redis.Redis(host=host,port=port,socket_timeout=timeout)
+     start = time.monotonic()
+     client = RedisInfo(host,port,timeout)
      stats = client.info()
      #mylogger.debug(stats)
-     end = time.time()
+     end = time.monotonic()
+     mylogger.debug(client.times)
 
      response_time = end - start
      resp_time = round(float(response_time), 6)
@@ -189,6 +304,29 @@ def main():
    except ZeroDivisionError:
        hit_rate = 100
 
+   #rates since the previous check
+   counters = {'keyspace_hits': keyspace_hits, 'keyspace_misses': keyspace_misses}
+   for name, counter in RATE_COUNTERS:
+       counters[name] = stats.get(counter, 0)
+   state_key = "%s:%s" % (host,port)
+   current = nagios_state.sample(counters)
+   previous = nagios_state.load("check_redis", state_key)
+   try:
+       nagios_state.save("check_redis", state_key, current)
+   except OSError as ex:
+       mylogger.debug("cannot save state: %s" % ex)
+
+   rates = None
+   elapsed, deltas = nagios_state.interval(previous, current, uptime)
+   if deltas is not None:
+       rates = nagios_state.per_second(deltas, elapsed)
+       lookups = deltas['keyspace_hits'] + deltas['keyspace_misses']
+       if lookups:
+           rates['hit_rate'] = round( float(deltas['keyspace_hits']) * 100 / lookups, 2)
+       else:
+           rates['hit_rate'] = 100
+       mylogger.debug("rates over %.1fs: %s" % (elapsed,rates))
+
    ############
    #perfdata
    ###########
@@ -199,10 +337,26 @@ def main():
    if args.response_time:
       resp_warn_data = round(float(response_warn), 6)
       resp_crit_data = round(float(response_crit), 6)
-   resp_time_data = str(resp_time) + ";" + str(resp_warn_data) + ";" + str(resp_crit_data) + ";0.000000"
-
-
-   perfdata= "response_time=%s used_memory=%s hit_rate=%s connections=%s evicted_keys=%s" % (resp_time_data,used_memory,hit_rate,connected_clients,evicted_keys)
+   phase = args.phase[0]
+   if phase == 'total':
+      resp_time_data = str(resp_time) + ";" + str(resp_warn_data) + ";" + str(resp_crit_data) + ";0.000000"
+      phase_data = nagios_http.times_perfdata(client.times)
+   else:
+      resp_time_data = str(resp_time)
+      phase_data = nagios_http.times_perfdata(client.times, phase, resp_warn_data, resp_crit_data)
+
+   perfdata= "response_time=%s used_memory=%s hit_rate=%s connections=%s evicted_keys=%s %s" % (resp_time_data,used_memory,hit_rate,connected_clients,evicted_keys,phase_data)
+
+   if rates is not None:
+      rate_thresholds = dict((rate[0], rate[1:]) for rate in args.rates or [])
+      for name in RATES:
+         warn, crit = rate_thresholds.get(name, ["", ""])
+         if name == 'hit_rate':
+            perfdata += " interval_hit_rate=%s%%;%s;%s" % (rates[name],warn,crit)
+         elif name.endswith('_bytes'):
+            perfdata += " %s_per_sec=%sB;%s;%s" % (name,rates[name],warn,crit)
+         else:
+            perfdata += " %s_per_sec=%s;%s;%s" % (name,rates[name],warn,crit)
 
    output = redis_info + " | " + perfdata;
 
@@ -217,11 +371,13 @@ def main():
 	   resp_warn = round(float(response_warn), 6)
 	   resp_crit = round(float(response_crit), 6)
 
-	   if (resp_time >= resp_crit) :
-                mylogger.critical("response_time %s > %s" % (resp_time,resp_crit) + " - " + output )
+	   time_name, checked_time = nagios_http.phase_threshold(phase, resp_time, client.times)
+
+	   if (checked_time >= resp_crit) :
+                mylogger.critical("%s %s > %s" % (time_name,checked_time,resp_crit) + " - " + output )
                 sys.exit(CRITICAL)
-	   elif (resp_time >= resp_warn) :
-	       mylogger.warning("response_time %s > %s" % (resp_time,resp_warn) + " - " + output )
+	   elif (checked_time >= resp_warn) :
+	       mylogger.warning("%s %s > %s" % (time_name,checked_time,resp_warn) + " - " + output )
 	       sys.exit(WARNING)
 
    #last_save_time
@@ -236,6 +392,25 @@ def main():
 	       mylogger.warning("last_save_time %ss > %s" % (last_save_time,last_save_time_warn) + " - " + output )
 	       sys.exit(WARNING)
 
+   #rates, skipped on the first check and after a restart
+   if args.rates and rates is not None:
+	   for name, warn, crit in args.rates:
+	       mylogger.debug("Rate %s: %s WARN: %s, CRIT %s " % (name,rates[name],warn,crit) )
+
+	       if name == 'hit_rate':
+	           if (rates[name] <= float(crit)) :
+	               mylogger.critical("interval_hit_rate %s%% < %s" % (rates[name],crit) + " - " + output )
+	               sys.exit(CRITICAL)
+	           elif (rates[name] <= float(warn)) :
+	               mylogger.warning("interval_hit_rate %s%% < %s" % (rates[name],warn) + " - " + output )
+	               sys.exit(WARNING)
+	       elif (rates[name] >= float(crit)) :
+	           mylogger.critical("%s_per_sec %s > %s" % (name,rates[name],crit) + " - " + output )
+	           sys.exit(CRITICAL)
+	       elif (rates[name] >= float(warn)) :
+	           mylogger.warning("%s_per_sec %s > %s" % (name,rates[name],warn) + " - " + output )
+	           sys.exit(WARNING)
+
    mylogger.info(output)
    sys.exit(OK)
 
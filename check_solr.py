@@ -3,7 +3,7 @@
 # ======================= SUMMARY ================================
 #
 # Program : check_solr.py
-# Version : 0.3
+# Version : 0.6
 # Date    : Sep 17, 2019
 # Author  : Jan Souza - me@jansouza.com
 #
@@ -38,21 +38,21 @@
 #  [0.1 - Sep 2019] First version of the code.
 #  [0.2 - Sep 2019] Fix Authentication argument
 #  [0.3 - May 2020] Fix Request lib Log Level
+#  [0.4 - Oct 2026] Use shared asyncio fetch layer (nagios_http.py) instead of requests
+#  [0.5 - Oct 2026] Add connect_time and request_time perfdata
+#  [0.6 - Oct 2026] Phase timings (dns, connect, tls, ttfb, body, parse) perfdata
 #
 #
 #  TODO
 #     (a) Get Threads Information
 #
 # ============================ START OF PROGRAM CODE =============================
-# sudo pip install requests | sudo easy_install requests
-# https://pypi.org/project/requests/
+# Requires nagios_http.py (shared HTTP fetch layer) in the same directory
 
 import argparse
 import logging
 import os, sys, time
-import requests
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+import nagios_http
 import xml.etree.ElementTree as ET
 from math import log
 
@@ -85,11 +85,11 @@ def convert_to_days(milliseconds):
 
     return "%s days, %s hours, %s minutes" % (days, hours, minutes)
 
-def get_args():
+def get_args(argv=None):
    """
    Supports the command-line arguments listed below.
    """
-   parser = argparse.ArgumentParser(description="Apache Solr Status Check for Nagios")
+   parser = argparse.ArgumentParser(prog=os.path.basename(__file__), description="Apache Solr Status Check for Nagios")
    parser._optionals.title = "Options"
 
    parser.add_argument('-H', nargs=1, required=False, help='Hostname or IP Address to check', dest='host', type=str, default=['127.0.0.1'])
@@ -101,12 +101,12 @@ def get_args():
    parser.add_argument('-t', nargs=1, required=False, help='Connection Timeout', dest='timeout', type=int)
    parser.add_argument('-v', '--verbose', required=False, help='Enable verbose output', dest='verbose', action='store_true')
 
-   args = parser.parse_args()
+   args = parser.parse_args(argv)
    return args
 
-def main():
+def main(argv=None):
    # Handling arguments
-   args = get_args()
+   args = get_args(argv)
 
    host = args.host[0]
    port = args.port[0]
@@ -130,11 +130,6 @@ def main():
    else:
        log_level = logging.INFO
 
-   #Request Debug Level
-   logging.getLogger("urllib3").setLevel(logging.WARNING)
-   if verbose:
-       logging.getLogger("urllib3").setLevel(logging.DEBUG)
-
    # Add custom level unknown
    logging.addLevelName(logging.DEBUG+1, 'UNKOWN')
    setattr(mylogger, 'unkown', debug_factory(mylogger, logging.DEBUG+1))
@@ -151,7 +146,7 @@ def main():
    stats = None
    try:
      mylogger.debug("Get Stats - HOSTNAME: %s PORT: %s TIMEOUT: %s" % (host,port,timeout))
-     start = time.time()
+     start = time.monotonic()
 
      url = "http://" + host + ":" + port + "/solr/admin/info/system"
      mylogger.debug("URL: %s" % (url))
@@ -161,14 +156,16 @@ def main():
          headers = {'Authorization': 'Basic %s' % basic_auth}
          mylogger.debug(headers)
 
-     res = requests.get(url, verify=False, headers=headers, timeout=timeout)
+     res = nagios_http.get(url, verify=False, headers=headers, timeout=timeout)
 
      if res.status_code != 200:
         mylogger.critical(str(res.status_code) + " Found")
         sys.exit(CRITICAL)
 
+     parse_start = time.monotonic()
      stats = res.json()
-     end = time.time()
+     res.parse_time = time.monotonic() - parse_start
+     end = time.monotonic()
      response_time = end - start
      resp_time = round(float(response_time), 6)
 
@@ -209,7 +206,7 @@ def main():
    mem_used_data = str(percent_used_memory) + "%;" + str(mem_warn_data) + ";" + str(mem_crit_data)
    heap_size_data = str(used_memory) + ";;;" + str(max_memory)
 
-   perfdata = "heap_percent_used=%s heap_used=%s" % (mem_used_data,heap_size_data)
+   perfdata = "heap_percent_used=%s heap_used=%s %s" % (mem_used_data,heap_size_data,nagios_http.phase_perfdata(res))
 
    output = solr_info + " | " + perfdata
 
@@ -3,7 +3,7 @@
 # ======================= SUMMARY ================================
 #
 # Program : check_tomcat.py
-# Version : 0.4
+# Version : 0.11
 # Date    : Sep 02, 2019
 # Author  : Jan Souza - me@jansouza.com
 #
@@ -42,23 +42,28 @@
 #  [0.2 - Sep 2019] Fix request timeout
 #  [0.3 - Sep 2019] Ajust perfdata output
 #  [0.4 - May 2020] Fix Request Log Level
+#  [0.5 - Oct 2026] Use shared asyncio fetch layer (nagios_http.py) instead of requests
+#  [0.6 - Oct 2026] Add connect_time and request_time perfdata
+#  [0.7 - Oct 2026] Phase timings (dns, connect, tls, ttfb, body, parse), --phase selects where -T applies
+#  [0.8 - Oct 2026] Parse status/all XML while it is downloaded (XMLParser target), no element tree (benchmarks/bench_tomcat_status.py)
+#  [0.9 - Oct 2026] requestInfo per connector: requests and bytes per second, error percent and mean time since the previous check, -r thresholds
+#  [0.10 - Oct 2026] Memory pools and old generation percent (-O), GC overhead since the previous check from jmxproxy (--gc, -G)
+#  [0.11 - Oct 2026] Stuck threads per connector (-S, --stuck-age) and top longest running requests (--top) from the workers, while streaming
 #
 #
 #  TODO
 #     (a) Get Server Information
-#     (b) Get Connectors Request Info (bytes_received, bytes_sent)
-#     (C) Get Memory Pool Informations
 #
 # ============================ START OF PROGRAM CODE =============================
-# sudo pip install requests | sudo easy_install requests
-# https://pypi.org/project/requests/
+# Requires nagios_http.py (shared HTTP fetch layer) and nagios_state.py
+# (counter state store) in the same directory
 
 import argparse
+import heapq
 import logging
 import os, sys, time
-import requests
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+import nagios_http
+import nagios_state
 import xml.etree.ElementTree as ET
 from math import log
 
@@ -69,6 +74,28 @@ WARNING  = 1
 CRITICAL = 2
 UNKNOWN  = 3
 
+# requestInfo counters saved per connector -> requestInfo attribute
+REQUEST_COUNTERS = [
+    ('requests', 'requestCount'),
+    ('errors', 'errorCount'),
+    ('processing_time', 'processingTime'),
+    ('bytes_received', 'bytesReceived'),
+    ('bytes_sent', 'bytesSent')]
+
+# Values per connector since the previous check -> (perfdata name, unit)
+RATES = [
+    ('requests', 'requests_per_sec', ''),
+    ('error_percent', 'error_percent', '%'),
+    ('mean_time', 'mean_time', 'ms'),
+    ('bytes_received', 'bytes_received_per_sec', 'B'),
+    ('bytes_sent', 'bytes_sent_per_sec', 'B')]
+RATE_NAMES = [name for name, _, _ in RATES]
+
+# <memorypool> names of the old generation (G1, Parallel, CMS, Serial)
+OLD_GEN_POOLS = ('Old Gen', 'Tenured Gen')
+
+GC_QUERY = "/jmxproxy/?qry=java.lang:type=GarbageCollector,*"
+
 mylogger = logging.getLogger(__name__)
 
 def debug_factory(logger, debug_level):
@@ -81,11 +108,11 @@ def debug_factory(logger, debug_level):
        logger._log(debug_level, msg, args, kwargs)
    return custom_debug
 
-def get_args():
+def get_args(argv=None):
    """
    Supports the command-line arguments listed below.
    """
-   parser = argparse.ArgumentParser(description="TOMCAT Status Check for Nagios")
+   parser = argparse.ArgumentParser(prog=os.path.basename(__file__), description="TOMCAT Status Check for Nagios")
    parser._optionals.title = "Options"
 
    parser.add_argument('-H', nargs=1, required=False, help='Hostname or IP Address to check', dest='host', type=str, default=['127.0.0.1'])
@@ -95,13 +122,27 @@ def get_args():
    parser.add_argument('-a', nargs=1, required=True, help='Authentication (use basic_encoder.py)', dest='basic_auth', type=str)
 
    parser.add_argument('-T', nargs=2, required=False, help='Measure the output connection response time in seconds -T [WARN,CRIT] \n Ex.: -T 0.1 0.5', dest='response_time', type=str)
+   parser.add_argument('--phase', nargs=1, required=False, help='Apply -T to one phase of the response time (default: total)', dest='phase', type=str, default=['total'], choices=['total'] + nagios_http.PHASES)
    parser.add_argument('-M', nargs=2, required=False, help='Measure the percent of used memory heap -M [WARN,CRIT] \n Ex.: -C 80 90', dest='mem_used', type=str)
+   parser.add_argument('-O', nargs=2, required=False, help='Measure the percent of used old generation memory pool -O [WARN,CRIT] \n Ex.: -O 80 90', dest='old_gen_used', type=str)
+   parser.add_argument('-G', nargs=2, required=False, help='Measure the percent of wall time spent in GC since the previous check, implies --gc -G [WARN,CRIT] \n Ex.: -G 5 10', dest='gc_overhead', type=str)
+   parser.add_argument('--gc', required=False, help='Query %s for the GarbageCollector collection counts and times (manager-jmx role)' % GC_QUERY, dest='gc', action='store_true')
    parser.add_argument('-C', nargs=2, required=False, help='Measure the percent of Threads Busy -C [WARN,CRIT] \n Ex.: -C 80 90', dest='threads_busy', type=str)
 
+   parser.add_argument('-S', nargs=2, required=False, help='Measure the number of threads serving a request for more than --stuck-age seconds, per connector -S [WARN,CRIT] \n Ex.: -S 1 5', dest='stuck_threads', type=str)
+   parser.add_argument('--stuck-age', nargs=1, required=False, help='Seconds after which a thread serving a request is counted as stuck (default: 600, as StuckThreadDetectionValve)', dest='stuck_age', type=float, default=[600])
+   parser.add_argument('--top', nargs=1, required=False, help='Number of longest running requests listed per connector (default: 5)', dest='top', type=int, default=[5])
+   parser.add_argument('-r', nargs=3, required=False, help='Threshold on a connector value since the previous check -r [NAME,WARN,CRIT], repeat for more values. NAME is one of %s (error_percent is the percent of requests in error, mean_time the ms per request, the others are per second). Ex.: -r error_percent 1 5 -r mean_time 200 500' % ", ".join(RATE_NAMES), dest='rates', type=str, action='append', metavar=('NAME', 'WARN', 'CRIT'))
+
    parser.add_argument('-t', nargs=1, required=False, help='Connection Timeout', dest='timeout', type=int)
    parser.add_argument('-v', '--verbose', required=False, help='Enable verbose output', dest='verbose', action='store_true')
 
-   args = parser.parse_args()
+   args = parser.parse_args(argv)
+   if args.top[0] < 1:
+      parser.error("argument --top: must be at least 1")
+   for rate in args.rates or []:
+      if rate[0] not in RATE_NAMES:
+         parser.error("argument -r: invalid name '%s' (choose from %s)" % (rate[0], ", ".join(RATE_NAMES)))
    return args
 
 # convert human readable size function
@@ -123,9 +164,185 @@ def sizeof_fmt(num):
     else:
         return None
 
-def main():
+class StatusParser:
+    """
+    Incremental parser of /manager/status/all?XML=true. feed() takes the
+    document chunk by chunk; the parser calls start() for every element and
+    only <memory>, the <memorypool> list and the <threadInfo>/<requestInfo>
+    attributes of every <connector> are kept. The <worker> elements in the
+    service stage are folded into a count of workers older than stuck_age
+    ms and a heap of the top longest running requests per connector. No
+    element tree is built, so memory use does not grow with the <worker>
+    elements of busy connectors.
+    """
+
+    def __init__(self, top=5, stuck_age=600000):
+        self._parser = ET.XMLParser(target=self)
+        self._connector = None
+        self._workers = None
+        self._seen = 0
+        self.top = top
+        self.stuck_age = stuck_age
+        self.memory = None
+        self.memory_pools = []
+        self.connectors = {}
+        self.workers = {}
+
+    def feed(self, data):
+        self._parser.feed(data)
+
+    def close(self):
+        # XMLParser.close() calls close() of its target, this object, again
+        parser, self._parser = self._parser, None
+        if parser is not None:
+            parser.close()
+
+    # XMLParser target interface
+    def start(self, tag, attrib):
+        if tag == 'worker':
+            if self._workers is not None and attrib.get('stage') == 'S':
+                self.worker(attrib)
+            return
+        if tag == 'memory':
+            if self.memory is None:
+                self.memory = attrib
+        elif tag == 'memorypool':
+            self.memory_pools.append(attrib)
+        elif tag == 'connector':
+            name = str(attrib.get('name'))
+            self._connector = self.connectors[name] = {}
+            self._workers = self.workers[name] = {'busy': 0, 'stuck': 0, 'longest': []}
+        elif tag == 'threadInfo' or tag == 'requestInfo':
+            if self._connector is not None:
+                self._connector[tag] = attrib
+
+    def end(self, tag):
+        if tag == 'connector':
+            self._connector = None
+            self._workers = None
+
+    def worker(self, attrib):
+        ' Count a worker serving a request and keep it when it is one of the top longest '
+        age = attrib.get('requestProcessingTime')
+        if age is None:
+            age = attrib.get('currentRequestProcessingTime', 0)
+        age = int(age)
+        workers = self._workers
+        workers['busy'] += 1
+        if age >= self.stuck_age:
+            workers['stuck'] += 1
+
+        longest = workers['longest']
+        self._seen += 1
+        if len(longest) < self.top:
+            heapq.heappush(longest, (age, self._seen, attrib))
+        elif age > longest[0][0]:
+            heapq.heapreplace(longest, (age, self._seen, attrib))
+
+    def longest(self, connector):
+        ' Return the top (age ms, worker attributes) of a connector, longest first '
+        return [(age, attrib) for age, _, attrib in sorted(self.workers[connector]['longest'], reverse=True)]
+
+def parserGC(html):
+    """
+    Return {collector name: {'count': CollectionCount, 'time': CollectionTime}}
+    from a jmxproxy java.lang:type=GarbageCollector,* query.
+    """
+    collectors = {}
+    collector = None
+    for line in html.splitlines():
+       items = line.split(': ')
+
+       if (items and len(items) != 2):
+           continue
+
+       key = items[0]
+       value = items[1]
+
+       if key == 'Name':
+           collector = collectors[value.split('name=')[-1]] = {'count': None, 'time': None}
+       elif collector is None:
+           continue
+       elif key == 'CollectionCount':
+           collector['count'] = int(value)
+       elif key == 'CollectionTime':
+           collector['time'] = int(value)
+
+    return dict((name, values) for name, values in collectors.items() if values['time'] is not None)
+
+def gc_overhead(key, collectors):
+   """
+   Save the CollectionTime of every collector and return the percent of wall
+   time spent in GC since the previous check, or None on the first check and
+   after a restart.
+   """
+   current = nagios_state.sample(dict((name, collectors[name]['time']) for name in collectors))
+   previous = nagios_state.load("check_tomcat", key)
+   try:
+       nagios_state.save("check_tomcat", key, current)
+   except OSError as ex:
+       mylogger.debug("cannot save state: %s" % ex)
+
+   elapsed, deltas = nagios_state.interval(previous, current)
+   if deltas is None:
+       return None
+   overhead = round(sum(deltas.values()) * 100.0 / (elapsed * 1000), 2)
+   mylogger.debug("%s GC time over %.1fs: %s ms, %s%%" % (key,elapsed,deltas,overhead))
+   return overhead
+
+def pool_name(name):
+   return str(name).replace(" ","_").replace("'","")
+
+def pool_percent_used(pool):
+   ' Percent of a <memorypool> in use, against usageMax or usageCommitted when it has no maximum '
+   limit = int(pool.get('usageMax'))
+   if limit <= 0:
+       limit = int(pool.get('usageCommitted'))
+   if limit <= 0:
+       return 0.0
+   return round(float(int(pool.get('usageUsed')) * 100) / limit, 2)
+
+async def fetch_status(url, gc_url, headers, timeout, stream):
+   ' Fetch the status page and the GC query on one kept-alive connection '
+   res = await nagios_http.fetch(url, verify=False, headers=headers, timeout=timeout, stream=stream)
+   gc_res = None
+   if gc_url and res.status_code == 200:
+       gc_res = await nagios_http.fetch(gc_url, verify=False, headers=headers, timeout=timeout)
+   return res, gc_res
+
+def interval_rates(key, request_info):
+   """
+   Save the requestInfo counters of a connector and return the requests and
+   bytes per second, the percent of requests in error and the mean processing
+   time in ms since the previous check, or None on the first check and when a
+   counter went down (Tomcat restarted).
+   """
+   current = nagios_state.sample(dict((name, int(request_info[attr])) for name, attr in REQUEST_COUNTERS))
+   previous = nagios_state.load("check_tomcat", key)
+   try:
+       nagios_state.save("check_tomcat", key, current)
+   except OSError as ex:
+       mylogger.debug("cannot save state: %s" % ex)
+
+   elapsed, deltas = nagios_state.interval(previous, current)
+   if deltas is None:
+       return None
+
+   requests = deltas['requests']
+   rates = nagios_state.per_second({'requests': requests,
+                                    'bytes_received': deltas['bytes_received'],
+                                    'bytes_sent': deltas['bytes_sent']}, elapsed)
+   rates['error_percent'] = 0.0
+   rates['mean_time'] = 0.0
+   if requests:
+       rates['error_percent'] = round(deltas['errors'] * 100.0 / requests, 2)
+       rates['mean_time'] = round(float(deltas['processing_time']) / requests, 2)
+   mylogger.debug("%s rates over %.1fs: %s" % (key,elapsed,rates))
+   return rates
+
+def main(argv=None):
    # Handling arguments
-   args = get_args()
+   args = get_args(argv)
 
    host = args.host[0]
    port = args.port[0]
@@ -145,6 +362,18 @@ def main():
        threads_busy_warn   = args.threads_busy[0]
        threads_busy_crit   = args.threads_busy[1]
 
+   if args.stuck_threads:
+       stuck_threads_warn   = args.stuck_threads[0]
+       stuck_threads_crit   = args.stuck_threads[1]
+
+   if args.old_gen_used:
+       old_gen_warn   = args.old_gen_used[0]
+       old_gen_crit   = args.old_gen_used[1]
+
+   if args.gc_overhead:
+       gc_overhead_warn   = args.gc_overhead[0]
+       gc_overhead_crit   = args.gc_overhead[1]
+
    #URL Context
    context = args.context[0]
 
@@ -159,11 +388,6 @@ def main():
    else:
        log_level = logging.INFO
 
-   #Request Debug Level
-   logging.getLogger("urllib3").setLevel(logging.WARNING)
-   if verbose:
-       logging.getLogger("urllib3").setLevel(logging.DEBUG)
-
    # Add custom level unknown
    logging.addLevelName(logging.DEBUG+1, 'UNKOWN')
    setattr(mylogger, 'unkown', debug_factory(mylogger, logging.DEBUG+1))
@@ -179,46 +403,65 @@ def main():
    ###########
 
    resp_time=0
-   status = {}
    try:
      mylogger.debug("Get Stats - HOSTNAME: %s PORT: %s CONTEXT: %s TIMEOUT: %s" % (host,port,context,timeout))
-     start = time.time()
+     start = time.monotonic()
 
      url = "http://" + host + ":" + port + context + "/status/all?XML=true"
      mylogger.debug("URL: %s" % (url))
+     gc_url = None
+     if args.gc or args.gc_overhead:
+        gc_url = "http://" + host + ":" + port + context + GC_QUERY
+        mylogger.debug("GC URL: %s" % (gc_url))
 
      headers = {'Authorization': 'Basic %s' % basic_auth}
      mylogger.debug(headers)
-     res = requests.get(url, verify=False, headers=headers, timeout=timeout)
+
+     # The XML is parsed while it is downloaded
+     status = StatusParser(args.top[0], int(args.stuck_age[0] * 1000))
+     parse_time = 0
+     def feed(chunk):
+        nonlocal parse_time
+        parse_start = time.monotonic()
+        status.feed(chunk)
+        parse_time += time.monotonic() - parse_start
+     res, gc_res = nagios_http.run(fetch_status(url, gc_url, headers, timeout, feed))
 
      if res.status_code != 200:
         mylogger.critical(str(res.status_code) + " Found")
         sys.exit(CRITICAL)
 
-     html = res.text
-     end = time.time()
+     parse_start = time.monotonic()
+     status.close()
+     res.parse_time = parse_time + time.monotonic() - parse_start
+     end = time.monotonic()
+     # With --gc, response_time is the one of the status page only
      response_time = end - start
+     if gc_res is not None:
+        response_time = res.elapsed
      resp_time = round(float(response_time), 6)
 
-     if (html is None) :
+     collectors = None
+     if gc_res is not None:
+        if gc_res.status_code != 200:
+           mylogger.critical("jmxproxy " + str(gc_res.status_code) + " Found")
+           sys.exit(CRITICAL)
+        collectors = parserGC(gc_res.text)
+        mylogger.debug(collectors)
+
+     if (status.memory is None) :
         mylogger.unkown("response_time %s" % resp_time)
         sys.exit(UNKNOWN)
 
+   except ET.ParseError as e:
+     mylogger.critical("I Can't understand the XML page. Error: %s" % (e))
+     sys.exit(CRITICAL)
    except Exception as ex:
      mylogger.critical(ex)
      sys.exit(CRITICAL)
 
-   try:
-       tree_xml = ET.fromstring(html)
-   except ET.ParseError as e:
-       tree_xml="ERROR: I Can't understand the XML page. Error: %s" %(e)
-       sys.exit(CRITICAL)
-
-   #show XML tree
-   #mylogger.debug(ET.dump(tree_xml))
-
    status_memory = {}
-   memory = tree_xml.find('.//memory')
+   memory = status.memory
 
    free_memory  = int(memory.get('free'))
    total_memory = int(memory.get('total'))
@@ -235,10 +478,20 @@ def main():
 
    mylogger.debug(status_memory)
 
+   #Memory pools, the old generation one is the fullest when several match
+   old_gen_percent = None
+   for pool in status.memory_pools:
+        if any(old_gen in pool.get('name', '') for old_gen in OLD_GEN_POOLS):
+            old_gen_percent = max(old_gen_percent or 0.0, pool_percent_used(pool))
+
+   #GC time since the previous check
+   gc_percent = None
+   if collectors:
+        gc_percent = gc_overhead("%s:%s gc" % (host, port), collectors)
+
    status_conn = {}
-   for connector in tree_xml.findall('./connector'):
-        connector_name = str(connector.get('name'))
-        thread = connector.find('./threadInfo')
+   for connector_name in status.connectors:
+        thread = status.connectors[connector_name]['threadInfo']
 
         max_thread = int(thread.get('maxThreads'))
         busy_thread = int(thread.get('currentThreadsBusy'))
@@ -248,6 +501,15 @@ def main():
 
    mylogger.debug(status_conn)
 
+   #requestInfo rates since the previous check, per connector
+   status_rates = {}
+   for connector_name in status.connectors:
+        request_info = status.connectors[connector_name].get('requestInfo')
+        if request_info is None:
+            continue
+        key = "%s:%s %s" % (host, port, connector_name.replace("\"",""))
+        status_rates[connector_name] = (int(request_info['maxTime']), interval_rates(key, request_info))
+
    ############
    #perfdata
    ###########
@@ -258,7 +520,13 @@ def main():
    if args.response_time:
       resp_warn_data = round(float(response_warn), 6)
       resp_crit_data = round(float(response_crit), 6)
-   resp_time_data = str(resp_time) + ";" + str(resp_warn_data) + ";" + str(resp_crit_data) + ";0.000000"
+   phase = args.phase[0]
+   if phase == 'total':
+      resp_time_data = str(resp_time) + ";" + str(resp_warn_data) + ";" + str(resp_crit_data) + ";0.000000"
+      phase_data = nagios_http.phase_perfdata(res)
+   else:
+      resp_time_data = str(resp_time)
+      phase_data = nagios_http.phase_perfdata(res, phase, resp_warn_data, resp_crit_data)
 
    #Memory Heap
    mem_warn_data = ""
@@ -294,9 +562,84 @@ def main():
        threads_data += "percent_used_thread-" + connector_name + "=" +  str(percent_thread) + "%;" + str(threads_warn_data) + ";" + str(threads_crit_data) + " "
        threads2_data += "busy_thread-" + connector_name + "=" +  str(busy_thread) + ";;;" + str(max_thread) + " "
 
-   perfdata = "response_time=%s heap_percent_used=%s heap_size=%s %s%s" % (resp_time_data,mem_used_data,heap_size_data,threads_data,threads2_data)
+   #Request rates
+   rate_thresholds = dict((rate[0], rate[1:]) for rate in args.rates or [])
+   rates_data = ""
+   for connector in status_rates:
+       max_time, rates = status_rates[connector]
+       connector_name = str(connector).replace("\"","")
+
+       rates_data += "max_time-" + connector_name + "=" + str(max_time) + "ms "
+       if rates is None:
+           continue
+       for name, label, unit in RATES:
+           warn, crit = rate_thresholds.get(name, ["", ""])
+           rates_data += label + "-" + connector_name + "=" + str(rates[name]) + unit + ";" + str(warn) + ";" + str(crit) + " "
+
+   #Stuck threads
+   stuck_warn_data = ""
+   stuck_crit_data = ""
+   if args.stuck_threads:
+      stuck_warn_data = stuck_threads_warn
+      stuck_crit_data = stuck_threads_crit
+
+   stuck_data = ""
+   long_output = ""
+   for connector in status.workers:
+       workers = status.workers[connector]
+       longest = status.longest(connector)
+       connector_name = str(connector).replace("\"","")
 
-   output = str(host + ":" + port + context) + " | " + perfdata
+       longest_age = 0
+       if longest:
+           longest_age = longest[0][0]
+       stuck_data += "stuck_thread-" + connector_name + "=" + str(workers['stuck']) + ";" + str(stuck_warn_data) + ";" + str(stuck_crit_data) + " "
+       stuck_data += "longest_request-" + connector_name + "=" + str(longest_age) + "ms "
+
+       if longest:
+           long_output += "\nTop %s longest running requests on %s (%s serving, %s over %ss):" % (len(longest),connector_name,workers['busy'],workers['stuck'],args.stuck_age[0])
+       for age, worker in longest:
+           uri = worker.get('currentUri', '')
+           if worker.get('currentQueryString'):
+               uri += "?" + worker.get('currentQueryString')
+           long_output += "\n  %.1fs %s %s %s%s" % (age / 1000.0,worker.get('remoteAddr'),worker.get('method'),worker.get('virtualHost'),uri)
+
+   #Memory pools
+   old_gen_warn_data = ""
+   old_gen_crit_data = ""
+   if args.old_gen_used:
+      old_gen_warn_data = old_gen_warn
+      old_gen_crit_data = old_gen_crit
+
+   pools_data = ""
+   for pool in status.memory_pools:
+       name = pool_name(pool.get('name'))
+       usage_max = int(pool.get('usageMax'))
+       if usage_max < 0:
+           usage_max = ""
+       pools_data += "pool_percent_used-" + name + "=" + str(pool_percent_used(pool)) + "% "
+       pools_data += "pool_used-" + name + "=" + pool.get('usageUsed') + "B;;;0;" + str(usage_max) + " "
+   if old_gen_percent is not None:
+       pools_data += "old_gen_percent_used=" + str(old_gen_percent) + "%;" + str(old_gen_warn_data) + ";" + str(old_gen_crit_data) + " "
+
+   #GC
+   gc_warn_data = ""
+   gc_crit_data = ""
+   if args.gc_overhead:
+      gc_warn_data = gc_overhead_warn
+      gc_crit_data = gc_overhead_crit
+
+   gc_data = ""
+   for collector in sorted(collectors or {}):
+       name = pool_name(collector)
+       gc_data += "gc_count-" + name + "=" + str(collectors[collector]['count']) + "c "
+       gc_data += "gc_time-" + name + "=" + str(collectors[collector]['time']) + "ms "
+   if gc_percent is not None:
+       gc_data += "gc_overhead=" + str(gc_percent) + "%;" + str(gc_warn_data) + ";" + str(gc_crit_data) + " "
+
+   perfdata = "response_time=%s %s heap_percent_used=%s heap_size=%s %s%s%s%s%s%s" % (resp_time_data,phase_data,mem_used_data,heap_size_data,pools_data,gc_data,threads_data,threads2_data,stuck_data,rates_data)
+
+   output = str(host + ":" + port + context) + " | " + perfdata + long_output
 
    ############
    #Threshold
@@ -309,11 +652,13 @@ def main():
 	   resp_warn = round(float(response_warn), 6)
 	   resp_crit = round(float(response_crit), 6)
 
-	   if (resp_time >= resp_crit) :
-            mylogger.critical("response_time %s > %s" % (resp_time,resp_crit) + " - " + output )
+	   time_name, checked_time = nagios_http.phase_threshold(phase, resp_time, nagios_http.phase_times(res))
+
+	   if (checked_time >= resp_crit) :
+            mylogger.critical("%s %s > %s" % (time_name,checked_time,resp_crit) + " - " + output )
             sys.exit(CRITICAL)
-	   elif (resp_time >= resp_warn) :
-	        mylogger.warning("response_time %s > %s" % (resp_time,resp_warn) + " - " + output )
+	   elif (checked_time >= resp_warn) :
+	        mylogger.warning("%s %s > %s" % (time_name,checked_time,resp_warn) + " - " + output )
 	        sys.exit(WARNING)
 
    #Memory Heap
@@ -327,6 +672,28 @@ def main():
 	       mylogger.warning("Memory Used %s > %s" % (percent_used_memory,mem_used_warn) + " - " + output )
 	       sys.exit(WARNING)
 
+   #Old generation
+   if args.old_gen_used and old_gen_percent is not None:
+	   mylogger.debug("Old Gen Used WARN: %s, CRIT %s " % (old_gen_warn,old_gen_crit) )
+
+	   if (old_gen_percent >= float(old_gen_crit)) :
+	       mylogger.critical("Old Gen Used %s > %s" % (old_gen_percent,old_gen_crit) + " - " + output )
+	       sys.exit(CRITICAL)
+	   elif (old_gen_percent >= float(old_gen_warn)) :
+	       mylogger.warning("Old Gen Used %s > %s" % (old_gen_percent,old_gen_warn) + " - " + output )
+	       sys.exit(WARNING)
+
+   #GC overhead, skipped on the first check and after a restart
+   if args.gc_overhead and gc_percent is not None:
+	   mylogger.debug("GC Overhead WARN: %s, CRIT %s " % (gc_overhead_warn,gc_overhead_crit) )
+
+	   if (gc_percent >= float(gc_overhead_crit)) :
+	       mylogger.critical("GC Overhead %s > %s" % (gc_percent,gc_overhead_crit) + " - " + output )
+	       sys.exit(CRITICAL)
+	   elif (gc_percent >= float(gc_overhead_warn)) :
+	       mylogger.warning("GC Overhead %s > %s" % (gc_percent,gc_overhead_warn) + " - " + output )
+	       sys.exit(WARNING)
+
    #Threads Busy
    if args.threads_busy:
        mylogger.debug("Treads Busy WARN: %s, CRIT %s " % (threads_busy_warn,threads_busy_crit) )
@@ -344,6 +711,39 @@ def main():
                 mylogger.warning("Treads Busy %s > %s" % (percent_thread,threads_busy_warn) + " - " + output )
                 sys.exit(WARNING)
 
+   #Stuck threads
+   if args.stuck_threads:
+       mylogger.debug("Stuck Threads WARN: %s, CRIT %s " % (stuck_threads_warn,stuck_threads_crit) )
+
+       for connector in status.workers:
+            stuck = status.workers[connector]['stuck']
+            connector_name = str(connector).replace("\"","")
+
+            if (stuck >= int(stuck_threads_crit)) :
+                mylogger.critical("Stuck Threads %s %s > %s" % (connector_name,stuck,stuck_threads_crit) + " - " + output )
+                sys.exit(CRITICAL)
+            elif (stuck >= int(stuck_threads_warn)) :
+                mylogger.warning("Stuck Threads %s %s > %s" % (connector_name,stuck,stuck_threads_warn) + " - " + output )
+                sys.exit(WARNING)
+
+   #Request rates, skipped on the first check and after a restart
+   if args.rates:
+       for connector in status_rates:
+            max_time, rates = status_rates[connector]
+            if rates is None:
+                continue
+            connector_name = str(connector).replace("\"","")
+
+            for name, warn, crit in args.rates:
+                mylogger.debug("%s %s: %s WARN: %s, CRIT %s " % (connector_name,name,rates[name],warn,crit) )
+
+                if (rates[name] >= float(crit)) :
+                    mylogger.critical("%s-%s %s > %s" % (name,connector_name,rates[name],crit) + " - " + output )
+                    sys.exit(CRITICAL)
+                elif (rates[name] >= float(warn)) :
+                    mylogger.warning("%s-%s %s > %s" % (name,connector_name,rates[name],warn) + " - " + output )
+                    sys.exit(WARNING)
+
    mylogger.info(output)
    sys.exit(OK)
 
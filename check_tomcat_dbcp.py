@@ -3,7 +3,7 @@
 # ======================= SUMMARY ================================
 #
 # Program : check_tomcat_dbcp.py
-# Version : 0.3
+# Version : 0.10
 # Date    : Sep 11, 2019
 # Author  : Jan Souza - me@jansouza.com
 #
@@ -40,21 +40,27 @@
 #  [0.1 - Sep 2019] First version of the code.
 #  [0.2 - Sep 2019] Ajust perfdata output
 #  [0.3 - May 2020] Fix Request lib Log Level
+#  [0.4 - Oct 2026] Use shared asyncio fetch layer (nagios_http.py) instead of requests
+#  [0.5 - Oct 2026] Add connect_time and request_time perfdata
+#  [0.6 - Oct 2026] Phase timings (dns, connect, tls, ttfb, body, parse) perfdata
+#  [0.7 - Oct 2026] --all: every DataSource and tomcat-jdbc ConnectionPool with one jmxproxy query, parsed while it is downloaded
+#  [0.8 - Oct 2026] --summary: worst state, count per state, sum/max/p95 and the --top busiest pools within --max-bytes
+#  [0.9 - Oct 2026] Connection leak trend per pool from a ring buffer of the last checks (--history, -L)
+#  [0.10 - Oct 2026] Borrow wait, waiters and created/destroyed connections per second (-B, -W)
 #
 #  TODO
 #
 # ============================ START OF PROGRAM CODE =============================
-# sudo pip install requests | sudo easy_install requests
-# https://pypi.org/project/requests/
+# Requires nagios_http.py (shared HTTP fetch layer) and nagios_state.py
+# (counter state store) in the same directory
 
 import argparse
 import logging
 import os, sys, time
-import requests
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-import xml.etree.ElementTree as ET
-from math import log
+import nagios_http
+import nagios_state
+import re
+from array import array
 
 # NAGIOS return codes :
 # https://nagios-plugins.org/doc/guidelines.html#AEN78
@@ -63,6 +69,43 @@ WARNING  = 1
 CRITICAL = 2
 UNKNOWN  = 3
 
+STATE_NAMES = {OK: 'OK', WARNING: 'WARNING', CRITICAL: 'CRITICAL', UNKNOWN: 'UNKOWN'}
+
+# Samples in the history of a pool before a leak trend is reported
+LEAK_MIN_SAMPLES = 4
+
+# ObjectName pattern of --all: the DBCP DataSource MBeans (class=javax.sql.DataSource)
+# and the tomcat-jdbc ConnectionPool ones (class=org.apache.tomcat.jdbc.pool.DataSource)
+BULK_QUERY = '*:class=*DataSource,*'
+POOL_TYPES = ('DataSource', 'ConnectionPool')
+
+# jmxproxy attribute -> converter, after lower-casing the first letter
+POOL_KEYS = {
+    'maxIdle': int,
+    'minIdle': int,
+    'evictionPolicyClassName': str,
+    'numActive': int,
+    'numIdle': int,
+    'jmxName': str,
+    'initialSize': int,
+    'url': str,
+    'maxTotal': int,
+    'maxWait': int,
+    'numWaiters': int,
+    'meanBorrowWaitTimeMillis': int,
+    'maxBorrowWaitTimeMillis': int,
+    'createdCount': int,
+    'destroyedCount': int}
+# DBCP 1 and tomcat-jdbc name maxTotal maxActive, DBCP 2 names maxWait
+# maxWaitMillis, and the tomcat-jdbc waitCount/releasedCount are the threads
+# waiting for a connection and the connections closed by the pool
+POOL_ALIASES = {'maxActive': 'maxTotal',
+                'maxWaitMillis': 'maxWait',
+                'waitCount': 'numWaiters',
+                'releasedCount': 'destroyedCount'}
+# Pool counters reported per second since the previous check (perfdata label, attribute)
+POOL_COUNTERS = [('created', 'createdCount'), ('destroyed', 'destroyedCount')]
+
 mylogger = logging.getLogger(__name__)
 
 def debug_factory(logger, debug_level):
@@ -75,11 +118,11 @@ def debug_factory(logger, debug_level):
        logger._log(debug_level, msg, args, kwargs)
    return custom_debug
 
-def get_args():
+def get_args(argv=None):
    """
    Supports the command-line arguments listed below.
    """
-   parser = argparse.ArgumentParser(description="TOMCAT DBCP Status Check for Nagios")
+   parser = argparse.ArgumentParser(prog=os.path.basename(__file__), description="TOMCAT DBCP Status Check for Nagios")
    parser._optionals.title = "Options"
 
    parser.add_argument('-H', nargs=1, required=False, help='Hostname or IP Address to check', dest='host', type=str, default=['127.0.0.1'])
@@ -87,91 +130,403 @@ def get_args():
    parser.add_argument('-u', nargs=1, required=False, help='Status URL Context', dest='context', type=str, default=['/manager'])
 
    parser.add_argument('-a', nargs=1, required=True, help='Authentication (use basic_encoder.py)', dest='basic_auth', type=str)
-   parser.add_argument('-j', nargs=1, required=True, help='JNDI name', dest='jndi_name', type=str)
+   parser.add_argument('-j', nargs=1, required=False, help='JNDI name', dest='jndi_name', type=str)
+   parser.add_argument('--all', required=False, help='Check every DBCP DataSource and tomcat-jdbc ConnectionPool of the instance with one jmxproxy query, instead of -j', dest='all', action='store_true')
+   parser.add_argument('-q', nargs=1, required=False, help='ObjectName pattern queried by --all (default: %s)' % BULK_QUERY, dest='query', type=str, default=[BULK_QUERY])
 
    parser.add_argument('-U', nargs=2, required=False, help='Measure the percent of used connections -U [WARN,CRIT] \n Ex.: -U 80 90', dest='pool_used', type=str)
 
+   parser.add_argument('-B', nargs=2, required=False, help='Measure the mean time in ms to borrow a connection (meanBorrowWaitTimeMillis) -B [WARN,CRIT] \n Ex.: -B 50 200', dest='borrow_wait', type=str)
+   parser.add_argument('-W', nargs=2, required=False, help='Measure the threads waiting for a connection (numWaiters, tomcat-jdbc waitCount) -W [WARN,CRIT] \n Ex.: -W 1 5', dest='waiters', type=str)
+
+   parser.add_argument('--history', nargs=1, required=False, help='Number of checks kept per pool for the connection leak trend (default: 12)', dest='history', type=int, default=[12])
+   parser.add_argument('-L', nargs=2, required=False, help='Measure the minutes before a pool whose numActive grows without returning to its baseline is exhausted -L [WARN,CRIT] \n Ex.: -L 120 30', dest='leak', type=str)
+
+   parser.add_argument('--summary', required=False, help='Evaluate every pool and report the worst state, the count per state, aggregates and only the --top busiest pools, within --max-bytes', dest='summary', action='store_true')
+   parser.add_argument('--top', nargs=1, required=False, help='Number of busiest pools in the --summary perfdata (default: 10)', dest='top', type=int, default=[10])
+   parser.add_argument('--max-bytes', nargs=1, required=False, help='Maximum size of the --summary output in bytes (default: 4096)', dest='max_bytes', type=int, default=[4096])
+
    parser.add_argument('-t', nargs=1, required=False, help='Connection Timeout', dest='timeout', type=int)
    parser.add_argument('-v', '--verbose', required=False, help='Enable verbose output', dest='verbose', action='store_true')
 
-   args = parser.parse_args()
+   args = parser.parse_args(argv)
+   if args.top[0] < 1:
+      parser.error("argument --top: must be at least 1")
+   if not args.jndi_name and not args.all:
+      parser.error("one of the arguments -j --all is required")
+   if args.history[0] < 2:
+      parser.error("argument --history: at least 2 checks are needed for a trend")
    return args
 
-def parserJMX(html):
-    status_pool = {}
-    parsed = {
-              'maxIdle':None,
-              'minIdle': None,
-              'evictionPolicyClassName': None,
-              'numActive': None,
-              'numIdle': None,
-              'jmxName': None,
-              'initialSize': None,
-              'url': None,
-              'maxTotal': None}
-
-    key_count = 0
-    context_name = ""
-    for line in html.splitlines():
-       items = line.split(': ')
-
-       if (items and len(items) != 2):
-           continue
-
-       key = items[0]
-       value = items[1]
-
-       if key == 'Name' :
-           if(key_count > 0):
-             status_pool[context_name] = parsed
-             key_count = 0
-             parsed = {}
-
-           context_name = str(value)
-           context_name = context_name.split('context=')[1]
-           context_name = context_name.split(',')[0]
-
-       if key == 'maxIdle':
-           parsed['maxIdle'] = int(value)
-           key_count += 1
-       if key == 'minIdle':
-            parsed['minIdle'] = int(value)
-            key_count += 1
-       if key == 'evictionPolicyClassName':
-            parsed['evictionPolicyClassName'] = str(value)
-            key_count += 1
-       if key == 'numActive':
-            parsed['numActive'] = int(value)
-            key_count += 1
-       if key == 'jmxName':
-            parsed['jmxName'] = str(value)
-            key_count += 1
-       if key == 'initialSize':
-            parsed['initialSize'] = int(value)
-            key_count += 1
-       if key == 'url':
-            parsed['url'] = str(value)
-            key_count += 1
-       if key == 'maxTotal' or key == 'maxActive':
-            parsed['maxTotal'] = int(value)
-            key_count += 1
-
-    status_pool[context_name] = parsed
-    if (key_count < 3):
-       return None
-    else:
-       return status_pool
-
-def main():
+class PoolParser:
+    """
+    Single pass parser of the jmxproxy qry output, fed chunk by chunk as it
+    is downloaded. Every "Name:" line starts a new MBean; only the POOL_KEYS
+    attributes of the DataSource and ConnectionPool MBeans are kept, the
+    rest of the output is dropped line by line.
+    """
+
+    def __init__(self):
+        self.pools = {}
+        self._pool = None
+        self._rest = b''
+
+    def feed(self, data):
+        lines = (self._rest + data).split(b'\n')
+        self._rest = lines.pop()
+        for line in lines:
+            self.line(line.decode('utf-8', 'replace').rstrip('\r'))
+
+    def close(self):
+        if self._rest:
+            self.line(self._rest.decode('utf-8', 'replace').rstrip('\r'))
+            self._rest = b''
+        self.end_mbean()
+
+    def line(self, line):
+        items = line.split(': ')
+        if (items and len(items) != 2):
+            return
+
+        key = items[0]
+        value = items[1]
+
+        if key == 'Name':
+            self.end_mbean()
+            self._pool = object_name(value)
+            return
+        if self._pool is None:
+            return
+
+        # tomcat-jdbc attributes are capitalized (NumActive, MaxActive)
+        key = key[:1].lower() + key[1:]
+        key = POOL_ALIASES.get(key, key)
+        if key in POOL_KEYS:
+            try:
+                self._pool[key] = POOL_KEYS[key](value)
+            except ValueError:
+                mylogger.debug("%s: invalid %s %s" % (self._pool['objectName'], key, value))
+
+    def end_mbean(self):
+        pool, self._pool = self._pool, None
+        if pool is None or pool.get('type') not in POOL_TYPES:
+            return
+        if pool.get('numActive') is None or pool.get('maxTotal') is None:
+            return
+        # A tomcat-jdbc pool may be registered as DataSource and ConnectionPool
+        key = (pool.get('context', ''), pool.get('name', ''))
+        if key not in self.pools:
+            self.pools[key] = pool
+
+def object_name(name):
+    ' Return the domain and key properties of a JMX ObjectName, with the quotes of the values removed '
+    domain, _, properties = name.partition(':')
+    parsed = {'objectName': name, 'domain': domain}
+    for key, value in re.findall(r'([^,=]+)=("[^"]*"|[^,]*)', properties):
+        parsed[key] = value.strip('"')
+    return parsed
+
+def percent_used(pool):
+    ' Percent of the pool connections in use, 0 for an unbounded pool (maxTotal <= 0) '
+    if pool['maxTotal'] <= 0:
+        return 0.0
+    return round(float(pool['numActive'] * 100) / pool['maxTotal'], 2)
+
+class PoolHistory:
+    """
+    Fixed-size ring buffer of the last checks of one pool: the time,
+    numActive, numIdle and waiting threads of every check are kept in
+    arrays, and the oldest sample is overwritten once the buffer is full.
+    """
+
+    FIELDS = [('times', 'd'), ('active', 'l'), ('idle', 'l'), ('waiters', 'l')]
+
+    def __init__(self, size, state=None):
+        self.size = size
+        self.pos = 0
+        self.count = 0
+        for name, typecode in self.FIELDS:
+            setattr(self, name, array(typecode, [0] * size))
+        if state and state.get('size') == size:
+            self.pos = state['pos']
+            self.count = state['count']
+            for name, typecode in self.FIELDS:
+                setattr(self, name, array(typecode, state[name]))
+
+    def add(self, now, active, idle, waiters):
+        self.times[self.pos] = now
+        self.active[self.pos] = active
+        self.idle[self.pos] = idle
+        self.waiters[self.pos] = waiters
+        self.pos = (self.pos + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def ordered(self, values):
+        ' Return the samples of one array, oldest first '
+        start = (self.pos - self.count) % self.size
+        if start + self.count <= self.size:
+            return values[start:start + self.count].tolist()
+        return (values[start:] + values[:self.pos]).tolist()
+
+    def state(self):
+        state = {'size': self.size, 'pos': self.pos, 'count': self.count}
+        for name, typecode in self.FIELDS:
+            state[name] = getattr(self, name).tolist()
+        return state
+
+    def trend(self, max_total):
+        """
+        Return (slope, leaking, exhaustion): the numActive least squares slope
+        in connections per hour, whether numActive grew and never went back to
+        the first sample of the history, and the seconds before maxTotal is
+        reached at that slope. None before LEAK_MIN_SAMPLES checks.
+        """
+        if self.count < min(LEAK_MIN_SAMPLES, self.size):
+            return None
+        times = self.ordered(self.times)
+        active = self.ordered(self.active)
+
+        mean_time = sum(times) / len(times)
+        mean_active = float(sum(active)) / len(active)
+        variance = sum((t - mean_time) ** 2 for t in times)
+        if variance == 0:
+            return None
+        slope = sum((t - mean_time) * (a - mean_active) for t, a in zip(times, active)) / variance
+
+        leaking = slope > 0 and min(active[1:]) > active[0]
+        exhaustion = None
+        if leaking and max_total > 0:
+            exhaustion = max(max_total - active[-1], 0) / slope
+        return round(slope * 3600, 2), leaking, exhaustion
+
+def pool_histories(key, pools, size, now):
+   """
+   Add the current check to the history of every pool, save them in one
+   state file per check and return {pool name: trend}.
+   """
+   previous = nagios_state.load("check_tomcat_dbcp", key) or {}
+   saved = previous.get('pools', {})
+
+   trends = {}
+   histories = {}
+   for pool_name, values in pools:
+       history = PoolHistory(size, saved.get(pool_name))
+       history.add(now, values['numActive'], values.get('numIdle') or 0, values.get('numWaiters') or 0)
+       histories[pool_name] = history.state()
+       trends[pool_name] = history.trend(values['maxTotal'])
+
+   try:
+       nagios_state.save("check_tomcat_dbcp", key, {'time': now, 'pools': histories})
+   except OSError as ex:
+       mylogger.debug("cannot save state: %s" % ex)
+   mylogger.debug(trends)
+   return trends
+
+def pool_rates(key, pools, now):
+   """
+   Save the POOL_COUNTERS of every pool and return {pool name: rates}, the
+   connections created and destroyed per second since the previous check,
+   or None for a new pool and when a counter went down (pool restarted).
+   """
+   previous = nagios_state.load("check_tomcat_dbcp", key) or {}
+   previous_pools = previous.get('pools', {})
+
+   rates = {}
+   current_pools = {}
+   for pool_name, values in pools:
+       counters = dict((name, values[attr]) for name, attr in POOL_COUNTERS if values.get(attr) is not None)
+       current = nagios_state.sample(counters, now)
+       current_pools[pool_name] = counters
+
+       rates[pool_name] = None
+       if counters and pool_name in previous_pools:
+           elapsed, deltas = nagios_state.interval(nagios_state.sample(previous_pools[pool_name], previous.get('time')), current)
+           if deltas is not None:
+               rates[pool_name] = nagios_state.per_second(deltas, elapsed)
+
+   try:
+       nagios_state.save("check_tomcat_dbcp", key, {'time': now, 'pools': current_pools})
+   except OSError as ex:
+       mylogger.debug("cannot save state: %s" % ex)
+   mylogger.debug(rates)
+   return rates
+
+def threshold_state(value, warn, crit):
+   ' State of a value missing from the pool (None) or compared to WARN/CRIT '
+   if value is None or crit is None:
+       return OK
+   if value >= crit:
+       return CRITICAL
+   if value >= warn:
+       return WARNING
+   return OK
+
+def wait_thresholds(args):
+   ' Return (wait_warn, wait_crit, waiters_warn, waiters_crit) of -B and -W, None when not set '
+   thresholds = [None, None, None, None]
+   if args.borrow_wait:
+       thresholds[0:2] = [float(args.borrow_wait[0]), float(args.borrow_wait[1])]
+   if args.waiters:
+       thresholds[2:4] = [int(args.waiters[0]), int(args.waiters[1])]
+   return thresholds
+
+def threshold_data(value):
+   if value is None:
+       return ""
+   return str(value)
+
+def wait_text(values):
+   text = ""
+   if values.get('numWaiters') is not None:
+       text += " waiters %s" % values['numWaiters']
+   if values.get('meanBorrowWaitTimeMillis') is not None:
+       text += " borrow wait %sms" % values['meanBorrowWaitTimeMillis']
+   return text
+
+def leak_state(trend, warn, crit):
+   ' State of a pool from its leak trend and the -L minutes '
+   if trend is None or trend[2] is None:
+       return OK
+   minutes = trend[2] / 60
+   if crit is not None and minutes <= crit:
+       return CRITICAL
+   if warn is not None and minutes <= warn:
+       return WARNING
+   return OK
+
+def leak_text(trend):
+   if trend is None or not trend[1]:
+       return ""
+   text = " leaking +%s/h" % trend[0]
+   if trend[2] is not None:
+       text += ", exhausted in %s min" % int(trend[2] / 60)
+   return text
+
+def percentile(values, percent):
+   ' Nearest-rank percentile of a list of values '
+   ordered = sorted(values)
+   rank = max(int(-(-len(ordered) * percent // 100)), 1)
+   return ordered[rank - 1]
+
+def pool_state(pool_used, warn, crit):
+   if crit is not None and pool_used >= crit:
+       return CRITICAL
+   if warn is not None and pool_used >= warn:
+       return WARNING
+   return OK
+
+def output_size(text):
+   return len(text.encode('utf-8'))
+
+def summary_output(args, name, pools, res, trends):
+   """
+   Evaluate -U, -B, -W and -L on every pool and return the worst state and an output
+   made of the count per state, sum/max/p95 perfdata, the --top busiest pools
+   and the pools not OK in the long output, cut to --max-bytes.
+   """
+   warn = crit = None
+   warn_data = crit_data = ""
+   if args.pool_used:
+       warn = round(float(args.pool_used[0]), 2)
+       crit = round(float(args.pool_used[1]), 2)
+       warn_data = str(warn)
+       crit_data = str(crit)
+   leak_warn = leak_crit = None
+   if args.leak:
+       leak_warn = float(args.leak[0])
+       leak_crit = float(args.leak[1])
+   wait_warn, wait_crit, waiters_warn, waiters_crit = wait_thresholds(args)
+
+   evaluated = []
+   count = {OK: 0, WARNING: 0, CRITICAL: 0}
+   for pool_name, values in pools:
+       pool_used = percent_used(values)
+       state = max(pool_state(pool_used, warn, crit), leak_state(trends[pool_name], leak_warn, leak_crit),
+                   threshold_state(values.get('meanBorrowWaitTimeMillis'), wait_warn, wait_crit),
+                   threshold_state(values.get('numWaiters'), waiters_warn, waiters_crit))
+       count[state] += 1
+       evaluated.append((state, pool_used, pool_name, values))
+
+   worst = OK
+   for state in (WARNING, CRITICAL):
+       if count[state]:
+           worst = state
+
+   used = [pool_used for _, pool_used, _, _ in evaluated]
+   active = [values['numActive'] for _, _, _, values in evaluated]
+   waiters = [values['numWaiters'] for _, _, _, values in evaluated if values.get('numWaiters') is not None]
+   borrow_wait = [values['meanBorrowWaitTimeMillis'] for _, _, _, values in evaluated if values.get('meanBorrowWaitTimeMillis') is not None]
+   text = "%s pools, %s critical, %s warning, %s ok - %s" % (len(pools),count[CRITICAL],count[WARNING],count[OK],name)
+   perfdata = ["pools=%s ok=%s warning=%s critical=%s" % (len(pools),count[OK],count[WARNING],count[CRITICAL]),
+               "active_sum=%s active_max=%s" % (sum(active),max(active)),
+               "leaking=%s" % len([trend for trend in trends.values() if trend and trend[1]]),
+               "percent_used_max=%s%%;%s;%s percent_used_p95=%s%%;%s;%s" % (max(used),warn_data,crit_data,percentile(used, 95),warn_data,crit_data),
+               nagios_http.phase_perfdata(res)]
+   if waiters:
+       perfdata.insert(3, "waiters_sum=%s waiters_max=%s;%s;%s" % (sum(waiters),max(waiters),threshold_data(waiters_warn),threshold_data(waiters_crit)))
+   if borrow_wait:
+       perfdata.insert(3, "borrow_wait_mean_max=%sms;%s;%s" % (max(borrow_wait),threshold_data(wait_warn),threshold_data(wait_crit)))
+
+   # Every part is added only while the whole output stays within the budget
+   budget = args.max_bytes[0] - output_size(STATE_NAMES[worst] + " - ")
+   size = output_size(text + " | " + " ".join(perfdata))
+
+   busiest = sorted(evaluated, key=lambda pool: (-pool[1], pool[2]))[:args.top[0]]
+   for state, pool_used, pool_name, values in busiest:
+       item = " percent_used-%s=%s%%;%s;%s used-%s=%s;;;%s" % (pool_name,pool_used,warn_data,crit_data,pool_name,values['numActive'],values['maxTotal'])
+       if size + output_size(item) > budget:
+           break
+       perfdata.append(item[1:])
+       size += output_size(item)
+
+   long_output = []
+   failed = sorted([pool for pool in evaluated if pool[0] != OK], key=lambda pool: (-pool[0], -pool[1], pool[2]))
+   more_size = output_size("\n... %s more" % len(failed))
+   for i, (state, pool_used, pool_name, values) in enumerate(failed):
+       line = "\n%s - %s %s%% (%s/%s)%s%s" % (STATE_NAMES[state],pool_name,pool_used,values['numActive'],values['maxTotal'],wait_text(values),leak_text(trends[pool_name]))
+       reserve = 0
+       if i < len(failed) - 1:
+           reserve = more_size
+       if size + output_size(line) + reserve > budget:
+           if size + more_size <= budget:
+               long_output.append("\n... %s more" % (len(failed) - i))
+           break
+       long_output.append(line)
+       size += output_size(line)
+
+   return worst, text + " | " + " ".join(perfdata) + "".join(long_output)
+
+def pool_label(pool, bulk):
+    ' Perfdata name of a pool: dbcp_<context>, and its JNDI name with --all '
+    app_name = str(pool.get('context', '')).replace("/","")
+    if not bulk:
+        return "dbcp_" + app_name
+    return "dbcp_" + (app_name or "ROOT") + "_" + str(pool.get('name', '')).replace("/","_")
+
+def nagios_exit(state, output):
+   """
+   Print the Nagios output line with the level name of the state and exit.
+   """
+   if state == OK:
+       mylogger.info(output)
+   elif state == WARNING:
+       mylogger.warning(output)
+   elif state == CRITICAL:
+       mylogger.critical(output)
+   else:
+       mylogger.unkown(output)
+   sys.exit(state)
+
+def main(argv=None):
    # Handling arguments
-   args = get_args()
+   args = get_args(argv)
 
    host = args.host[0]
    port = args.port[0]
 
    #Authentication
    basic_auth = args.basic_auth[0]
-   jndi_name = args.jndi_name[0]
+   bulk = args.all
 
    if args.pool_used:
        pool_used_warn   = args.pool_used[0]
@@ -191,11 +546,6 @@ def main():
    else:
        log_level = logging.INFO
 
-   #Request Debug Level
-   logging.getLogger("urllib3").setLevel(logging.WARNING)
-   if verbose:
-       logging.getLogger("urllib3").setLevel(logging.DEBUG)
-
    # Add custom level unknown
    logging.addLevelName(logging.DEBUG+1, 'UNKOWN')
    setattr(mylogger, 'unkown', debug_factory(mylogger, logging.DEBUG+1))
@@ -210,15 +560,18 @@ def main():
    #GET DATA
    ###########
 
-   stats = None
+   pools = None
    resp_time=0
    try:
      mylogger.debug("Get Stats - HOSTNAME: %s PORT: %s CONTEXT: %s TIMEOUT: %s" % (host,port,context,timeout))
-     start = time.time()
+     start = time.monotonic()
 
      #jmx = "/jmxproxy/?get=Catalina:type=DataSource,path=/bkoffice,host=localhost,class=javax.sql.DataSource,name=jdbc/bkoffice&att=numActive"
      #jmx = "/jmxproxy/?get=Catalina:type=DataSource,host=localhost,context=/BKLaborAPI,class=javax.sql.DataSource,name=\"jdbc/bkoffice\"&att=numActive"
-     jmx = "/jmxproxy/?qry=Catalina:type=DataSource,host=localhost,context=*,class=javax.sql.DataSource,name=\"" + jndi_name + "\""
+     if bulk:
+        jmx = "/jmxproxy/?qry=" + args.query[0]
+     else:
+        jmx = "/jmxproxy/?qry=Catalina:type=DataSource,host=localhost,context=*,class=javax.sql.DataSource,name=\"" + args.jndi_name[0] + "\""
 
      url = "http://" + host + ":" + port + context + jmx
      mylogger.debug("URL: %s" % (url))
@@ -226,22 +579,30 @@ def main():
      headers = {'Authorization': 'Basic %s' % basic_auth}
      mylogger.debug(headers)
 
-     res = requests.get(url, verify=False, headers=headers, timeout=timeout)
+     # The qry output is parsed while it is downloaded
+     parser = PoolParser()
+     parse_time = 0
+     def feed(chunk):
+        nonlocal parse_time
+        parse_start = time.monotonic()
+        parser.feed(chunk)
+        parse_time += time.monotonic() - parse_start
+     res = nagios_http.get(url, verify=False, headers=headers, timeout=timeout, stream=feed)
      if res.status_code != 200:
         mylogger.critical(str(res.status_code) + " Found")
         sys.exit(CRITICAL)
 
-     html = res.text
-     mylogger.debug(html)
+     parse_start = time.monotonic()
+     parser.close()
+     res.parse_time = parse_time + time.monotonic() - parse_start
+     pools = [(pool_label(pool, bulk), pool) for pool in parser.pools.values()]
+     mylogger.debug(pools)
 
-     stats = parserJMX(html)
-     mylogger.debug(stats)
-
-     end = time.time()
+     end = time.monotonic()
      response_time = end - start
      resp_time = round(float(response_time), 6)
 
-     if (stats is None) :
+     if not pools :
         mylogger.unkown("response_time %s" % resp_time)
         sys.exit(UNKNOWN)
 
@@ -249,6 +610,25 @@ def main():
      mylogger.critical(ex)
      sys.exit(CRITICAL)
 
+   #Connection leak trend over the last --history checks
+   if bulk:
+       history_key = "%s:%s%s %s" % (host, port, context, args.query[0])
+   else:
+       history_key = "%s:%s%s %s" % (host, port, context, args.jndi_name[0])
+   now = time.time()
+   trends = pool_histories(history_key, pools, args.history[0], now)
+   rates = pool_rates(history_key + " counters", pools, now)
+
+   #-B and -W need the attribute on at least one pool (DBCP 2 / tomcat-jdbc)
+   for option, attr in (('borrow_wait', 'meanBorrowWaitTimeMillis'), ('waiters', 'numWaiters')):
+       if getattr(args, option) and not [values for _, values in pools if values.get(attr) is not None]:
+           mylogger.unkown("%s not found in the pool MBeans - %s" % (attr, str(host + ":" + port + context)))
+           sys.exit(UNKNOWN)
+
+   if args.summary:
+       state, output = summary_output(args, str(host + ":" + port + context), pools, res, trends)
+       nagios_exit(state, output)
+
    ############
    #perfdata
    ###########
@@ -260,25 +640,46 @@ def main():
       pool_used_warn_data = str(round(float(pool_used_warn), 2))
       pool_used_crit_data = str(round(float(pool_used_crit), 2))
 
+   leak_warn_data = ""
+   leak_crit_data = ""
+   if args.leak:
+      leak_warn_data = str(float(args.leak[0]) * 60)
+      leak_crit_data = str(float(args.leak[1]) * 60)
+
+   wait_warn, wait_crit, waiters_warn, waiters_crit = wait_thresholds(args)
+
    pool_used_perfdata = ""
    dbcp_perfdata = ""
-   for context_name in stats :
-       values = stats[context_name]
-       mylogger.debug(context_name)
-       mylogger.debug(values)
-
+   wait_perfdata = ""
+   leak_perfdata = ""
+   for pool_name, values in pools :
        numActive  = values['numActive']
        maxTotal  = values['maxTotal']
-       pool_used = numActive * 100 / maxTotal
-       pool_used_value = str(round(float(pool_used), 2))
-
-       app_name = str(context_name).replace("/","")
-       pool_name = "dbcp_" + app_name
+       pool_used_value = str(percent_used(values))
 
        pool_used_perfdata += "percent_used-" + pool_name + "=" + pool_used_value + "%;"+ pool_used_warn_data +";"+pool_used_crit_data + " "
        dbcp_perfdata += "used-" + pool_name + "=" + str(numActive) + ";;;" + str(maxTotal) + " "
 
-   perfdata = "%s%s" % (pool_used_perfdata,dbcp_perfdata)
+       if values.get('meanBorrowWaitTimeMillis') is not None:
+           wait_perfdata += "borrow_wait_mean-" + pool_name + "=" + str(values['meanBorrowWaitTimeMillis']) + "ms;" + threshold_data(wait_warn) + ";" + threshold_data(wait_crit) + ";0"
+           if values.get('maxWait', 0) > 0:
+               wait_perfdata += ";" + str(values['maxWait'])
+           wait_perfdata += " "
+       if values.get('maxBorrowWaitTimeMillis') is not None:
+           wait_perfdata += "borrow_wait_max-" + pool_name + "=" + str(values['maxBorrowWaitTimeMillis']) + "ms "
+       if values.get('numWaiters') is not None:
+           wait_perfdata += "waiters-" + pool_name + "=" + str(values['numWaiters']) + ";" + threshold_data(waiters_warn) + ";" + threshold_data(waiters_crit) + " "
+       if rates[pool_name]:
+           for label, rate in sorted(rates[pool_name].items()):
+               wait_perfdata += label + "-" + pool_name + "=" + str(rate) + " "
+
+       trend = trends[pool_name]
+       if trend is not None:
+           leak_perfdata += "active_slope-" + pool_name + "=" + str(trend[0]) + " "
+           if trend[2] is not None:
+               leak_perfdata += "exhaustion-" + pool_name + "=" + str(int(trend[2])) + "s;" + leak_warn_data + ";" + leak_crit_data + " "
+
+   perfdata = "%s%s%s%s%s" % (pool_used_perfdata,dbcp_perfdata,wait_perfdata,leak_perfdata,nagios_http.phase_perfdata(res))
    output = str(host + ":" + port + context) + " | " + perfdata
 
    ############
@@ -292,14 +693,8 @@ def main():
        pool_used_warn = round(float(pool_used_warn), 2)
        pool_used_crit = round(float(pool_used_crit), 2)
 
-       for context_name in stats:
-           values = stats[context_name]
-
-           numActive  = values['numActive']
-           maxTotal  = values['maxTotal']
-           pool_used = round(float(numActive * 100 / maxTotal), 2)
-           app_name = str(context_name).replace("/","")
-           pool_name = "dbcp_" + app_name
+       for pool_name, values in pools:
+           pool_used = percent_used(values)
 
            if (pool_used >= pool_used_crit):
                mylogger.critical("pool_used: %s - %s > %s" % (pool_name,str(pool_used),pool_used_crit) + " - " + output )
@@ -308,6 +703,35 @@ def main():
                mylogger.warning("pool_used: %s - %s > %s" % (pool_name,str(pool_used),pool_used_warn) + " - " + output )
                sys.exit(WARNING)
 
+   #borrow_wait and waiters
+   if args.borrow_wait or args.waiters:
+       mylogger.debug("Borrow Wait WARN: %s, CRIT %s Waiters WARN: %s, CRIT %s" % (wait_warn,wait_crit,waiters_warn,waiters_crit) )
+
+       for pool_name, values in pools:
+           for attr, warn, crit in (('meanBorrowWaitTimeMillis', wait_warn, wait_crit), ('numWaiters', waiters_warn, waiters_crit)):
+               state = threshold_state(values.get(attr), warn, crit)
+               if state == CRITICAL:
+                   mylogger.critical("%s: %s - %s > %s" % (attr,pool_name,values[attr],crit) + " - " + output )
+                   sys.exit(CRITICAL)
+               elif state == WARNING:
+                   mylogger.warning("%s: %s - %s > %s" % (attr,pool_name,values[attr],warn) + " - " + output )
+                   sys.exit(WARNING)
+
+   #leak: minutes before a leaking pool is exhausted
+   if args.leak:
+       leak_warn = float(args.leak[0])
+       leak_crit = float(args.leak[1])
+       mylogger.debug("Leak WARN: %s, CRIT %s " % (leak_warn,leak_crit) )
+
+       for pool_name, values in pools:
+           state = leak_state(trends[pool_name], leak_warn, leak_crit)
+           if state == CRITICAL:
+               mylogger.critical("leak: %s -%s" % (pool_name,leak_text(trends[pool_name])) + " - " + output )
+               sys.exit(CRITICAL)
+           elif state == WARNING:
+               mylogger.warning("leak: %s -%s" % (pool_name,leak_text(trends[pool_name])) + " - " + output )
+               sys.exit(WARNING)
+
    mylogger.info(output)
    sys.exit(OK)
 
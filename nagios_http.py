@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+#
+# ======================= SUMMARY ================================
+#
+# Program : nagios_http.py
+# Version : 0.7
+# Date    : Oct 17, 2026
+# Author  : Jan Souza - me@jansouza.com
+#
+# Shared asyncio HTTP fetch layer used by check_apache, check_nginx,
+# check_tomcat, check_tomcat_dbcp, check_solr and check_jboss.
+#
+# A single process can keep hundreds of status page fetches in flight on one
+# event loop (fetch_all), and the plugins call it through the blocking get()
+# wrapper. Inside check_daemon.py every check shares one loop (start_loop).
+#
+# Connections are kept alive in a pool per event loop, keyed by scheme, host,
+# port and certificate verification, with a cap on connections per host and
+# an idle expiry.
+#
+# Each Response reports the time of every phase, measured with a monotonic
+# clock: dns_time, connect_time (TCP), tls_time (all 0 when a pooled
+# connection was reused), ttfb_time (request sent to status line), body_time
+# (headers and body) and request_time (ttfb + body). The plugin sets
+# parse_time; phase_perfdata() formats them all, and phase_threshold()
+# returns the time -T applies to with --phase.
+#
+#   res = nagios_http.get("http://127.0.0.1/server-status?auto", timeout=10)
+#   res.status_code, res.text, res.json()
+#
+#   results = nagios_http.run(nagios_http.fetch_all([{'url': u} for u in urls], limit=50))
+#
+# ======================= VERSION HISTORY and TODO ================================
+#
+#
+#  [0.1 - Oct 2026] First version of the code.
+#  [0.2 - Oct 2026] Connection pool with keep-alive, connect_time/request_time
+#  [0.3 - Oct 2026] Phase timings: dns, connect, tls, ttfb, body, parse
+#  [0.4 - Oct 2026] fetch(stream=) feeds the body chunk by chunk to the caller
+#  [0.5 - Oct 2026] fetch() follows up to MAX_REDIRECTS redirects, as requests did
+#  [0.6 - Oct 2026] times_perfdata() and phase_threshold() shared with check_redis and check_memcached
+#  [0.7 - Oct 2026] No retry on a new connection once part of a streamed body was fed
+#
+#
+#  TODO
+#     (a) Support gzip Content-Encoding
+#
+# ============================ START OF PROGRAM CODE =============================
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os, re, time
+import socket
+import ssl
+import threading
+import weakref
+from urllib.parse import quote, urljoin, urlsplit
+
+USER_AGENT = 'nagios-plugins'
+DEFAULT_LIMIT = 100
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_IDLE_TIMEOUT = 30
+# Redirects followed by fetch(), as requests did (http -> https, /manager -> /manager/)
+MAX_REDIRECTS = 5
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+PHASES = ['dns', 'connect', 'tls', 'ttfb', 'body', 'parse']
+
+mylogger = logging.getLogger(__name__)
+
+_loop = None
+_pools = weakref.WeakKeyDictionary()
+_ssl_context = {}
+_safe_chars = "!#$%&'()*+,/:;=?@[]~"
+_challenge_regex = re.compile(r'(\w+)=(?:"([^"]*)"|([^\s,]*))')
+
+class HTTPError(Exception):
+    pass
+
+class Response(object):
+    """
+    Result of a fetch, with the attributes the plugins used from requests.
+    """
+
+    def __init__(self, url, status_code, reason, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.elapsed = None
+        self.dns_time = 0.0
+        self.connect_time = 0.0
+        self.tls_time = 0.0
+        self.ttfb_time = 0.0
+        self.body_time = 0.0
+        self.request_time = None
+        # Set by the plugin to the time spent parsing the body
+        self.parse_time = 0.0
+
+    @property
+    def encoding(self):
+        ' Return the charset from the Content-Type header '
+        for param in self.headers.get('content-type', '').split(';')[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'charset':
+                return value.strip('"\'')
+        return None
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+class DigestAuth(object):
+    """
+    HTTP Digest Authentication (RFC 2617), as used by the JBoss/WildFly
+    management interface.
+    """
+
+    def __init__(self, username, password):
+        self.username = username
+        self.password = password
+        self._nonce_count = 0
+
+    def header(self, method, path, challenge):
+        ' Return the Authorization header answering a WWW-Authenticate challenge '
+        params = dict((k.lower(), v1 or v2) for k, v1, v2 in _challenge_regex.findall(challenge))
+        realm = params.get('realm', '')
+        nonce = params.get('nonce', '')
+        qop = params.get('qop')
+        algorithm = params.get('algorithm', 'MD5')
+
+        if algorithm.upper().startswith('SHA-256'):
+            hash_func = lambda x: hashlib.sha256(x.encode('utf-8')).hexdigest()
+        else:
+            hash_func = lambda x: hashlib.md5(x.encode('utf-8')).hexdigest()
+
+        ha1 = hash_func("%s:%s:%s" % (self.username, realm, self.password))
+        ha2 = hash_func("%s:%s" % (method, path))
+
+        value = 'Digest username="%s", realm="%s", nonce="%s", uri="%s", algorithm=%s' % (
+                 self.username, realm, nonce, path, algorithm)
+        if qop:
+            self._nonce_count += 1
+            nc = "%08x" % self._nonce_count
+            cnonce = hashlib.sha1(os.urandom(8)).hexdigest()[:16]
+            response = hash_func("%s:%s:%s:%s:auth:%s" % (ha1, nonce, nc, cnonce, ha2))
+            value += ', qop=auth, nc=%s, cnonce="%s"' % (nc, cnonce)
+        else:
+            response = hash_func("%s:%s:%s" % (ha1, nonce, ha2))
+        value += ', response="%s"' % response
+        if 'opaque' in params:
+            value += ', opaque="%s"' % params['opaque']
+        return value
+
+def ssl_context(verify):
+    ' Return a cached client SSL context '
+    if verify not in _ssl_context:
+        context = ssl.create_default_context()
+        if not verify:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        _ssl_context[verify] = context
+    return _ssl_context[verify]
+
+async def read_head(reader):
+    ' Read the status line and headers, return (status_code, reason, headers, version) '
+    line = await reader.readline()
+    if not line:
+        raise HTTPError("Connection closed without response")
+    items = line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+    if len(items) < 2 or not items[0].startswith('HTTP/'):
+        raise HTTPError("Bad status line: %r" % line)
+    status_code = int(items[1])
+    reason = items[2] if len(items) > 2 else ''
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        headers[key.strip().lower()] = value.strip()
+    return status_code, reason, headers, items[0]
+
+async def iter_body(reader, headers, method, status_code):
+    ' Yield the response body in chunks (Content-Length, chunked or until EOF) '
+    if method == 'HEAD' or status_code in (204, 304) or status_code < 200:
+        return
+
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        while True:
+            line = await reader.readline()
+            # Only the last-chunk "0" ends the body, EOF before it is a truncated response
+            if not line.strip():
+                raise HTTPError("Connection closed before the last chunk")
+            size = int(line.split(b';')[0].strip(), 16)
+            if size == 0:
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+
+    elif 'content-length' in headers:
+        remaining = int(headers['content-length'])
+        while remaining > 0:
+            data = await reader.read(min(remaining, 65536))
+            if not data:
+                raise HTTPError("Connection closed with %s bytes left" % remaining)
+            remaining -= len(data)
+            yield data
+
+    else:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            yield data
+
+def request_path(parts):
+    ' Return the quoted path and query of a split URL '
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    return quote(path, safe=_safe_chars)
+
+def build_request(method, parts, headers, data):
+    ' Return the request bytes for a split URL '
+    path = request_path(parts)
+
+    lines = ["%s %s HTTP/1.1" % (method, path),
+             "Host: %s" % parts.netloc.rpartition('@')[2],
+             "User-Agent: %s" % USER_AGENT,
+             "Accept-Encoding: identity",
+             "Connection: keep-alive"]
+    for key in headers:
+        lines.append("%s: %s" % (key, headers[key]))
+    if data is not None:
+        lines.append("Content-Length: %s" % len(data))
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + (data or b'')
+
+def keep_alive(version, headers, method, status_code):
+    ' Return True if the connection can be reused after this response '
+    connection = headers.get('connection', '').lower()
+    if 'close' in connection:
+        return False
+    if version == 'HTTP/1.0' and 'keep-alive' not in connection:
+        return False
+    if method == 'HEAD' or status_code in (204, 304) or status_code < 200:
+        return True
+    return 'chunked' in headers.get('transfer-encoding', '').lower() or 'content-length' in headers
+
+class Connection(object):
+
+    def __init__(self, key, reader, writer):
+        self.key = key
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+
+    def usable(self):
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self):
+        self.writer.close()
+
+class ConnectionPool(object):
+    """
+    Keep-alive connections keyed by (scheme, host, port, verify), shared by every
+    fetch on one event loop. At most max_per_host requests are in flight to
+    the same endpoint; idle connections are closed after idle_timeout seconds.
+    """
+
+    def __init__(self, max_per_host=DEFAULT_MAX_PER_HOST, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self._idle = {}
+        self._slots = {}
+        self._last_expire = time.monotonic()
+
+    def slot(self, key):
+        ' Return the semaphore capping the connections to key '
+        if key not in self._slots:
+            self._slots[key] = asyncio.Semaphore(self.max_per_host)
+        return self._slots[key]
+
+    def get_idle(self, key):
+        ' Return an idle connection to key, or None '
+        self.expire()
+        idle = self._idle.get(key)
+        while idle:
+            conn = idle.pop()
+            if conn.usable() and time.monotonic() - conn.last_used < self.idle_timeout:
+                return conn
+            conn.close()
+        return None
+
+    async def open(self, key, verify):
+        """
+        Open a new connection to key. Return the connection and the
+        (dns_time, connect_time, tls_time) it took.
+        """
+        scheme, host, port, _ = key
+        loop = asyncio.get_running_loop()
+
+        start = time.monotonic()
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        dns_time = time.monotonic() - start
+
+        start = time.monotonic()
+        sock = None
+        for i, (family, socktype, proto, _, address) in enumerate(infos):
+            sock = socket.socket(family, socktype, proto)
+            sock.setblocking(False)
+            try:
+                await loop.sock_connect(sock, address)
+                break
+            except OSError:
+                sock.close()
+                if i == len(infos) - 1:
+                    raise
+        connect_time = time.monotonic() - start
+
+        start = time.monotonic()
+        context = None
+        if scheme == 'https':
+            context = ssl_context(verify)
+        reader, writer = await asyncio.open_connection(sock=sock, ssl=context,
+                                                       server_hostname=host if context else None)
+        tls_time = time.monotonic() - start if context else 0.0
+
+        return Connection(key, reader, writer), (dns_time, connect_time, tls_time)
+
+    def release(self, conn, reuse):
+        ' Give a connection back to the pool, or close it '
+        if reuse and conn.usable():
+            conn.last_used = time.monotonic()
+            self._idle.setdefault(conn.key, []).append(conn)
+        else:
+            conn.close()
+
+    def expire(self):
+        ' Close the connections idle for more than idle_timeout (at most once a second) '
+        now = time.monotonic()
+        if now - self._last_expire < 1:
+            return
+        self._last_expire = now
+        for key in list(self._idle):
+            alive = []
+            for conn in self._idle[key]:
+                if now - conn.last_used < self.idle_timeout:
+                    alive.append(conn)
+                else:
+                    conn.close()
+            if alive:
+                self._idle[key] = alive
+            else:
+                del self._idle[key]
+
+    def close(self):
+        for key in self._idle:
+            for conn in self._idle[key]:
+                conn.close()
+        self._idle = {}
+
+def get_pool():
+    ' Return the connection pool of the running event loop '
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = ConnectionPool()
+    return pool
+
+async def exchange(pool, conn, method, url, parts, headers, data, stream=None):
+    ' Send one request on a connection and read the whole response '
+    start = time.monotonic()
+    reuse = False
+    try:
+        conn.writer.write(build_request(method, parts, headers, data))
+        await conn.writer.drain()
+
+        status_code, reason, resp_headers, version = await read_head(conn.reader)
+        ttfb_time = time.monotonic() - start
+        chunks = []
+        if stream is not None and 200 <= status_code < 300:
+            async for chunk in iter_body(conn.reader, resp_headers, method, status_code):
+                stream(chunk)
+        else:
+            async for chunk in iter_body(conn.reader, resp_headers, method, status_code):
+                chunks.append(chunk)
+        reuse = keep_alive(version, resp_headers, method, status_code)
+    finally:
+        pool.release(conn, reuse)
+
+    res = Response(url, status_code, reason, resp_headers, b''.join(chunks))
+    res.request_time = time.monotonic() - start
+    res.ttfb_time = ttfb_time
+    res.body_time = res.request_time - ttfb_time
+    return res
+
+async def send(method, url, headers, data, verify, stream=None):
+    ' Send one request on a pooled keep-alive connection and read the whole response '
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    # A connection opened without certificate checks is not reused by a verified request
+    key = (parts.scheme, parts.hostname, port, bool(verify))
+    pool = get_pool()
+
+    # A retry must not feed the stream callback a body it already got part of
+    fed = False
+    feed = None
+    if stream is not None:
+        def feed(chunk):
+            nonlocal fed
+            fed = True
+            stream(chunk)
+
+    async with pool.slot(key):
+        res = None
+        conn = pool.get_idle(key)
+        if conn is not None:
+            try:
+                res = await exchange(pool, conn, method, url, parts, headers, data, feed)
+            except (OSError, asyncio.IncompleteReadError, HTTPError) as ex:
+                if fed:
+                    raise HTTPError("%s: connection closed in the middle of the body (%s)" % (url, ex))
+                # The server closed the idle connection, retry on a new one
+                res = None
+        if res is None:
+            conn, times = await pool.open(key, verify)
+            res = await exchange(pool, conn, method, url, parts, headers, data, feed)
+            res.dns_time, res.connect_time, res.tls_time = times
+
+    mylogger.debug('%s://%s:%s "%s %s" %s %s dns=%.6f connect=%.6f tls=%.6f ttfb=%.6f body=%.6f' % (parts.scheme, parts.hostname,
+                   port, method, parts.path, res.status_code, len(res.content), res.dns_time, res.connect_time, res.tls_time,
+                   res.ttfb_time, res.body_time))
+    return res
+
+async def fetch(url, method='GET', headers=None, data=None, auth=None, timeout=10, verify=False, stream=None):
+    """
+    Fetch a URL and return a Response.
+
+    auth is a (username, password) tuple for Basic Authentication or a
+    DigestAuth instance. timeout applies to the whole request. stream is a
+    callable given each chunk of a 2xx body as it arrives, instead of
+    keeping the body in Response.content, so big pages can be parsed
+    incrementally.
+
+    Up to MAX_REDIRECTS redirects are followed like requests did: 303, and
+    301/302 after a POST, become a GET without body, the Authorization
+    header is dropped when the host changes, and a Digest challenge is
+    answered again on every hop.
+    """
+    headers = dict(headers or {})
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if isinstance(auth, tuple):
+        token = base64.b64encode(("%s:%s" % auth).encode('utf-8')).decode('ascii')
+        headers['Authorization'] = 'Basic %s' % token
+
+    async def _send(method, url, data):
+        res = await send(method, url, headers, data, verify, stream)
+        if isinstance(auth, DigestAuth) and res.status_code == 401:
+            challenge = res.headers.get('www-authenticate', '')
+            if challenge.lower().startswith('digest'):
+                path = request_path(urlsplit(url))
+                headers['Authorization'] = auth.header(method, path, challenge)
+                first = res
+                res = await send(method, url, headers, data, verify, stream)
+                res.dns_time += first.dns_time
+                res.connect_time += first.connect_time
+                res.tls_time += first.tls_time
+        return res
+
+    async def _fetch():
+        start = time.monotonic()
+        current_method, current_url, current_data = method, url, data
+        dns_time = connect_time = tls_time = 0.0
+        for hop in range(MAX_REDIRECTS + 1):
+            res = await _send(current_method, current_url, current_data)
+            res.dns_time += dns_time
+            res.connect_time += connect_time
+            res.tls_time += tls_time
+            location = res.headers.get('location')
+            if res.status_code not in REDIRECT_CODES or not location:
+                break
+            if hop == MAX_REDIRECTS:
+                raise HTTPError("%s exceeded %s redirects" % (url, MAX_REDIRECTS))
+
+            next_url = urljoin(current_url, location)
+            mylogger.debug("%s %s redirect to %s" % (current_url, res.status_code, next_url))
+            if urlsplit(next_url).hostname != urlsplit(current_url).hostname:
+                headers.pop('Authorization', None)
+            if (res.status_code == 303 and current_method != 'HEAD') or (res.status_code in (301, 302) and current_method == 'POST'):
+                current_method, current_data = 'GET', None
+                for name in list(headers):
+                    if name.lower() in ('content-type', 'content-length'):
+                        del headers[name]
+            current_url = next_url
+            dns_time, connect_time, tls_time = res.dns_time, res.connect_time, res.tls_time
+        res.elapsed = time.monotonic() - start
+        return res
+
+    try:
+        return await asyncio.wait_for(_fetch(), timeout)
+    except asyncio.TimeoutError:
+        raise HTTPError("%s timed out. (timeout=%s)" % (url, timeout))
+
+async def fetch_all(calls, limit=DEFAULT_LIMIT):
+    """
+    Run many fetches concurrently, at most limit at a time.
+
+    calls is a list of fetch() keyword dicts. Return a list in the same
+    order holding a Response or the exception raised for that call.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _one(call):
+        async with semaphore:
+            return await fetch(**call)
+
+    return await asyncio.gather(*[_one(call) for call in calls], return_exceptions=True)
+
+def phase_times(res):
+    ' Return {phase: seconds} for a Response, see PHASES '
+    return {'dns': res.dns_time, 'connect': res.connect_time, 'tls': res.tls_time,
+            'ttfb': res.ttfb_time, 'body': res.body_time, 'parse': res.parse_time}
+
+def times_perfdata(times, phase=None, warn="", crit=""):
+    """
+    Return the <phase>_time perfdata of a {phase: seconds} dict, in PHASES
+    order, with the -T thresholds on the phase they apply to. Also used by
+    check_redis and check_memcached, whose clients have no tls phase.
+    """
+    perfdata = []
+    for name in PHASES:
+        if name not in times:
+            continue
+        value = "%.6f" % times[name]
+        if name == phase:
+            value += ";" + str(warn) + ";" + str(crit) + ";0.000000"
+        perfdata.append("%s_time=%s" % (name, value))
+    return " ".join(perfdata)
+
+def phase_perfdata(res, phase=None, warn="", crit=""):
+    ' Return the times_perfdata() of a Response, and its request_time '
+    return "%s request_time=%.6f" % (times_perfdata(phase_times(res), phase, warn, crit), res.request_time)
+
+def phase_threshold(phase, response_time, times):
+    ' Return the name and the value -T applies to: response_time, or <phase>_time with --phase '
+    if phase == 'total':
+        return "response_time", response_time
+    return phase + "_time", round(float(times[phase]), 6)
+
+def start_loop(max_per_host=DEFAULT_MAX_PER_HOST, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """
+    Start a shared event loop in a background thread. Once started, run()
+    and get() from any thread execute on it instead of on a new loop, and
+    keep-alive connections are reused across calls.
+    """
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+        _pools[_loop] = ConnectionPool(max_per_host, idle_timeout)
+        thread = threading.Thread(target=_loop.run_forever, name='nagios_http')
+        thread.daemon = True
+        thread.start()
+    return _loop
+
+def run(coro):
+    ' Run a coroutine to completion from blocking code '
+    if _loop is not None:
+        return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
+    async def _run():
+        try:
+            return await coro
+        finally:
+            get_pool().close()
+    return asyncio.run(_run())
+
+def request(method, url, **kwargs):
+    return run(fetch(url, method=method, **kwargs))
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
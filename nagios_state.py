@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+#
+# ======================= SUMMARY ================================
+#
+# Program : nagios_state.py
+# Version : 0.1
+# Date    : Oct 17, 2026
+# Author  : Jan Souza - me@jansouza.com
+#
+# Shared counter state store for the plugins that report rates per second
+# since the previous check instead of lifetime totals.
+#
+# Every plugin/key pair (ex. check_redis and "127.0.0.1:6379") has one small
+# JSON file with the time of the last check and its counters. The file is
+# written to a temporary name and renamed, so a check never reads a partial
+# state, also when check_daemon.py runs checks of the same key in parallel.
+#
+# The directory is $NAGIOS_PLUGIN_STATE_DIRECTORY, or /var/tmp/nagios-plugins.
+#
+#   previous = nagios_state.load('check_redis', '127.0.0.1:6379')
+#   current = nagios_state.sample(counters)
+#   nagios_state.save('check_redis', '127.0.0.1:6379', current)
+#   elapsed, deltas = nagios_state.interval(previous, current, uptime)
+#
+# ======================= VERSION HISTORY and TODO ================================
+#
+#
+#  [0.1 - Oct 2026] First version of the code.
+#
+#
+#  TODO
+#     (a)
+#
+# ============================ START OF PROGRAM CODE =============================
+
+import json
+import logging
+import os, re, time
+import threading
+
+STATE_DIRECTORY = os.environ.get('NAGIOS_PLUGIN_STATE_DIRECTORY', '/var/tmp/nagios-plugins')
+
+mylogger = logging.getLogger(__name__)
+
+def state_path(plugin, key, directory=None):
+    ' Return the state file of a plugin/key pair '
+    if directory is None:
+        directory = STATE_DIRECTORY
+    name = re.sub(r'[^A-Za-z0-9_.-]', '_', "%s_%s" % (plugin, key))
+    return os.path.join(directory, name + '.json')
+
+def load(plugin, key, directory=None):
+    ' Return the state saved by the previous check, or None '
+    path = state_path(plugin, key, directory)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as ex:
+        mylogger.debug("no previous state in %s: %s" % (path, ex))
+        return None
+
+def save(plugin, key, state, directory=None):
+    ' Write the state atomically, creating the directory if needed '
+    path = state_path(plugin, key, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = "%s.%s.%s" % (path, os.getpid(), threading.get_ident())
+    with open(tmp, 'w') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+def sample(counters, now=None):
+    ' Return a state with the counters and the current time '
+    if now is None:
+        now = time.time()
+    return {'time': now, 'counters': counters}
+
+def interval(previous, current, uptime=None):
+    """
+    Return (elapsed, deltas) between two states, or (None, None) when there
+    is no previous state, no time has passed, or the counters were reset: a
+    counter went down, or the uptime is shorter than the interval.
+    """
+    if not previous or 'counters' not in previous:
+        return None, None
+    elapsed = current['time'] - previous['time']
+    if elapsed <= 0:
+        return None, None
+    if uptime is not None and uptime < elapsed:
+        mylogger.debug("restart detected: uptime %s < interval %s" % (uptime, elapsed))
+        return None, None
+
+    deltas = {}
+    for name, value in current['counters'].items():
+        if name not in previous['counters']:
+            return None, None
+        delta = value - previous['counters'][name]
+        if delta < 0:
+            mylogger.debug("counter reset detected: %s %s -> %s" % (name, previous['counters'][name], value))
+            return None, None
+        deltas[name] = delta
+    return elapsed, deltas
+
+def per_second(deltas, elapsed):
+    ' Return a dict of rates per second, rounded like the rest of the perfdata '
+    return dict((name, round(float(delta) / elapsed, 2)) for name, delta in deltas.items())